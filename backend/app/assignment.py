@@ -0,0 +1,441 @@
+"""Global one-to-one (or one-to-capacity) pairing of firms and investors.
+
+The per-entity endpoints give every firm its own top 5, so one popular
+investor can top every list. This module builds the firm x investor score
+matrix with a vectorized equivalent of ``calculate_investor_match_score``,
+prunes it to each firm's top ``candidates`` investors, and runs a
+firm-proposing stable matching in which each investor accepts at most
+``capacity`` firms.
+
+Both sides rank pairs by the same score, so the stable matching is also the
+greedy max-weight matching over the candidate edges (within 1/2 of optimal).
+"""
+import copy
+import heapq
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+from sqlalchemy.orm import Session
+
+from app.geo import EARTH_RADIUS_KM, LOCATION_BANDS
+from app.etag import current_generation
+from app.match import parse_amount
+from app.models.assignment_run import AssignmentRun
+from app.models.firm import Firm
+from app.models.investor import Investor
+
+# keep each scored block around this many cells so temporaries stay cache-sized
+_BLOCK_CELLS = 262_144
+
+
+def _number(value: Any) -> float:
+    """Numeric column as float; None/0 (falsy in the scalar scorer) become NaN."""
+    return float(value) if value else np.nan
+
+
+def _percent(value: Optional[str]) -> float:
+    if not value or "%" not in value:
+        return np.nan
+    try:
+        return float(value.replace("%", ""))
+    except ValueError:
+        return np.nan
+
+
+def _amount(value: Any) -> float:
+    if not value:
+        return np.nan
+    try:
+        return parse_amount(value) if isinstance(value, str) else float(value)
+    except Exception:
+        return np.nan
+
+
+class _Vocab:
+    """Process-wide string -> id map, so sides built at different times share codes."""
+
+    def __init__(self, key=lambda v: v):
+        self.key = key
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def codes(self, values: Sequence[Optional[str]]) -> np.ndarray:
+        """Vocab ids for ``values``; empty/None -> -1 (the all-zero last row/column of a pair table)."""
+        out = np.full(len(values), -1, dtype=np.int32)
+        with self._lock:
+            for i, v in enumerate(values):
+                if v:
+                    k = self.key(v)
+                    if k not in self._ids:
+                        self._ids[k] = len(self.values)
+                        self.values.append(k)
+                    out[i] = self._ids[k]
+        return out
+
+
+class _Containment:
+    """Which industry values contain one another (the 3-point partial match).
+
+    Rows are filled per queried value, so a per-entity request costs one
+    substring check per distinct value on the other side. They're kept in a
+    bounded LRU and extended as the vocab grows.
+    """
+
+    def __init__(self, vocab: _Vocab, maxsize: int = 1024):
+        self.vocab = vocab
+        self._rows: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def row(self, code: int, n: int) -> np.ndarray:
+        """Bool row over the first ``n`` vocab values, plus a trailing False for missing values."""
+        with self._lock:
+            row = self._rows.get(code)
+        if row is not None and len(row) >= n + 1:
+            return np.append(row[:n], False) if len(row) > n + 1 else row
+        start = 0 if row is None else len(row) - 1
+        grown = np.zeros(n + 1, dtype=bool)
+        if row is not None:
+            grown[:start] = row[:start]
+        if code >= 0:
+            value = self.vocab.values[code]
+            grown[start:n] = [value in other or other in value for other in self.vocab.values[start:n]]
+        with self._lock:
+            self._rows[code] = grown
+        return grown
+
+
+def _haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Vectorized ``app.geo.haversine_km``; inputs in degrees."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dp, dl = p2 - p1, np.radians(lon2 - lon1)
+    a = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+class _BandTable:
+    """Location band points for every (firm point, investor point) pair.
+
+    Coordinates are only ever resolved from the gazetteer, so there are few
+    distinct points and a cell is a lookup rather than a haversine. Missing
+    coordinates (code -1) hit the all-zero last row/column.
+    """
+
+    def __init__(self, vocab: _Vocab):
+        self.vocab = vocab
+        self._lock = threading.Lock()
+        self._snapshot = (0, np.zeros((1, 1), dtype=np.uint8))
+
+    def get(self) -> np.ndarray:
+        n, table = self._snapshot
+        if n == len(self.vocab.values):
+            return table
+        with self._lock:
+            n, table = self._snapshot
+            values = self.vocab.values[:]
+            if len(values) == n:
+                return table
+            lat = np.array([v[0] for v in values], dtype=np.float64)
+            lon = np.array([v[1] for v in values], dtype=np.float64)
+            # same argument order as the scalar scorer: investor first
+            km = _haversine_km(lat[None, :], lon[None, :], lat[:, None], lon[:, None])
+            table = np.zeros((len(values) + 1, len(values) + 1), dtype=np.uint8)
+            taken = np.zeros(km.shape, dtype=bool)
+            for max_km, points in LOCATION_BANDS:
+                hit = (km <= max_km) & ~taken
+                taken |= hit
+                table[:-1, :-1][hit] = points
+            self._snapshot = (len(values), table)
+            return table
+
+
+_VOCABS = {
+    "industry": _Vocab(str.lower),
+    "risk_tolerance": _Vocab(str.lower),
+    "location": _Vocab(str.lower),
+    "investment_stage": _Vocab(str.lower),
+    "meeting_frequency": _Vocab(str.lower),
+}
+_CONTAINS = _Containment(_VOCABS["industry"])
+
+# risk levels one step apart score 6; the investor side is compared
+# lowercased and the firm side as stored, as in the scalar scorer
+_RISK_LEVELS = {"low": 0, "medium": 1, "high": 2}
+_RISK_ADJACENT = np.zeros((4, 4), dtype=np.uint8)  # [firm level, investor level]; -1 (other) -> last
+_RISK_ADJACENT[[0, 1, 1, 2], [1, 0, 2, 1]] = 6
+_POINTS = _Vocab()
+_BANDS = _BandTable(_POINTS)
+_EQUAL_POINTS = (("industry", 5), ("risk_tolerance", 10), ("location", 10), ("investment_stage", 5), ("meeting_frequency", 10))
+
+
+class _Side:
+    """Column arrays for one side of the matrix."""
+
+    def __init__(self, rows: Sequence[Any]):
+        self.rows = rows
+        self.years = np.array([_number(r.years_active) for r in rows], dtype=np.float64)
+        self.num_investments = np.array([_number(r.num_investments) for r in rows], dtype=np.float64)
+        self.investment_size = np.array([_number(r.investment_size) for r in rows], dtype=np.float64)
+        self.roi = np.array([_percent(r.rate_of_return) for r in rows], dtype=np.float64)
+        self.success = np.array([_percent(r.success_rate) for r in rows], dtype=np.float64)
+        self.reserved = np.array([_amount(r.reserved_capital) for r in rows], dtype=np.float64)
+        self.point = _POINTS.codes([
+            (float(r.latitude), float(r.longitude))
+            if r.latitude is not None and r.longitude is not None else None
+            for r in rows
+        ])
+        self.has_coords = self.point >= 0
+        self.board_seat = np.array([bool(r.board_seat) for r in rows])
+        self.follow_on = np.array([bool(r.follow_on_rate) for r in rows])
+        self.codes = {field: vocab.codes([getattr(r, field) for r in rows]) for field, vocab in _VOCABS.items()}
+        self.risk_as_investor = np.array(
+            [_RISK_LEVELS.get(r.risk_tolerance.lower(), -1) if r.risk_tolerance else -1 for r in rows], dtype=np.int8
+        )
+        self.risk_as_firm = np.array([_RISK_LEVELS.get(r.risk_tolerance, -1) for r in rows], dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, sl) -> "_Side":
+        """Rows ``sl`` (a slice, which gives views, or an index array)."""
+        view = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                setattr(view, name, value[sl])
+        view.rows = self.rows[sl] if isinstance(sl, slice) else [self.rows[i] for i in sl]
+        view.codes = {field: codes[sl] for field, codes in self.codes.items()}
+        return view
+
+
+def _add(score: np.ndarray, mask: np.ndarray, points: int) -> None:
+    score += mask * np.uint8(points)
+
+
+def _tiers(score, inv_col, firm_row, tiers, compare) -> None:
+    """Add the points of the first tier where ``compare(inv, firm * factor)`` holds.
+
+    NaN (missing) on either side fails every comparison, so it scores 0.
+    """
+    taken = None
+    for factor, points in tiers:
+        hit = compare(inv_col, firm_row * factor if factor != 1.0 else firm_row)
+        if taken is not None:
+            hit &= ~taken
+            taken |= hit
+        else:
+            taken = hit.copy()
+        _add(score, hit, points)
+
+
+def score_block(firm: _Side, inv: _Side) -> np.ndarray:
+    """Vectorized ``calculate_investor_match_score`` for every pair, shape (len(firm), len(inv)).
+
+    Points are whole numbers and total at most 105, so they're summed in
+    uint8 (a quarter of the memory traffic) and returned as float32.
+    """
+    score = np.zeros((len(firm), len(inv)), dtype=np.uint8)
+
+    # industry substring match (exact matches are scored below)
+    fc, ic = firm.codes["industry"], inv.codes["industry"]
+    n = len(_VOCABS["industry"].values)
+    uniq, inverse = np.unique(fc, return_inverse=True)
+    rows = np.stack([_CONTAINS.row(int(code), n) for code in uniq])
+    _add(score, rows[inverse.ravel()][:, ic] & (fc[:, None] != ic[None, :]), 3)
+
+    score += _RISK_ADJACENT[firm.risk_as_firm][:, inv.risk_as_investor]
+
+    # location: distance band when both sides have coordinates, else exact name
+    has = firm.has_coords[:, None] & inv.has_coords[None, :]
+    for field, points in _EQUAL_POINTS:
+        fc = firm.codes[field][:, None]
+        same = (fc == inv.codes[field][None, :]) & (fc >= 0)
+        if field == "location":
+            same &= ~has
+        _add(score, same, points)
+    if has.any():
+        score += _BANDS.get()[firm.point][:, inv.point]
+
+    # tiered numeric rules: first matching threshold wins, as in the scalar scorer
+    _tiers(score, inv.years[None, :], firm.years[:, None], ((1.0, 5), (0.5, 3)), np.greater_equal)
+    _tiers(score, inv.num_investments[None, :], firm.num_investments[:, None],
+           ((1.0, 15), (1.5, 10), (2.0, 5)), np.less_equal)
+    _tiers(score, inv.investment_size[None, :], firm.investment_size[:, None],
+           ((1.0, 10), (0.5, 5)), np.greater_equal)
+    _tiers(score, inv.roi[None, :], firm.roi[:, None], ((1.0, 10), (0.8, 5)), np.greater_equal)
+    _tiers(score, inv.success[None, :], firm.success[:, None], ((1.0, 5),), np.greater_equal)
+    _tiers(score, inv.reserved[None, :], firm.reserved[:, None], ((1.0, 5), (0.5, 3)), np.greater_equal)
+
+    score += (10 * inv.board_seat + 5 * inv.follow_on).astype(np.uint8)[None, :]
+    return score.astype(np.float32)
+
+
+class ScoreMatrix:
+    """Vectorized ``calculate_investor_match_score`` over all firm x investor pairs."""
+
+    def __init__(self, investors: Sequence[Any], firms: Sequence[Any]):
+        self.investors = investors
+        self.firms = firms
+        self._inv = _Side(investors)
+        self._firm = _Side(firms)
+
+    def block(self, start: int, stop: int) -> np.ndarray:
+        """Scores for firms[start:stop] against every investor, shape (stop - start, n_investors)."""
+        return score_block(self._firm[start:stop], self._inv)
+
+    def _keys(self, block: np.ndarray) -> np.ndarray:
+        """Scores made unique, ties ranked by lower investor index (exact in float64)."""
+        n_inv = len(self.investors)
+        return block.astype(np.float64) * n_inv + np.arange(n_inv - 1, -1, -1)
+
+    def top_candidates(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Each firm's ``k`` best investors: (investor indices, scores), both (n_firms, k), best first."""
+        n_firms, n_inv = len(self.firms), len(self.investors)
+        k = min(k, n_inv)
+        idx = np.empty((n_firms, k), dtype=np.int64)
+        val = np.empty((n_firms, k), dtype=np.float32)
+        step = max(1, _BLOCK_CELLS // max(1, n_inv))
+        for start in range(0, n_firms, step):
+            stop = min(n_firms, start + step)
+            block = self.block(start, stop)
+            keys = self._keys(block)
+            if k < n_inv:
+                part = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+            else:
+                part = np.broadcast_to(np.arange(n_inv), block.shape).copy()
+            order = np.argsort(-np.take_along_axis(keys, part, axis=1), axis=1)
+            idx[start:stop] = np.take_along_axis(part, order, axis=1)
+            val[start:stop] = np.take_along_axis(block, idx[start:stop], axis=1)
+        return idx, val
+
+    def next_candidates(self, firms: Sequence[int], depth: Sequence[int]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Investors ranked ``depth[i]`` to ``2 * depth[i]`` for each of ``firms``, as (indices, scores).
+
+        Ranks follow the same order as ``top_candidates``, so a firm that ran
+        out of candidates continues exactly where its list stopped; doubling
+        keeps the number of rescoring rounds logarithmic.
+        """
+        n_inv = len(self.investors)
+        out = []
+        step = max(1, _BLOCK_CELLS // max(1, n_inv))
+        for start in range(0, len(firms), step):
+            rows = np.asarray(firms[start:start + step], dtype=np.int64)
+            block = score_block(self._firm[rows], self._inv)
+            keys = self._keys(block)
+            for r in range(len(rows)):
+                lo = depth[start + r]
+                hi = min(n_inv, 2 * lo)
+                if lo >= hi:
+                    out.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                    continue
+                part = np.argpartition(-keys[r], hi - 1)[:hi] if hi < n_inv else np.arange(n_inv)
+                part = part[np.argsort(-keys[r][part])][lo:]
+                out.append((part, block[r, part]))
+        return out
+
+
+def stable_assignment(
+    candidates: np.ndarray,
+    scores: np.ndarray,
+    n_investors: int,
+    capacity: int = 1,
+    more: Optional[Callable[[List[int], List[int]], List[Tuple[np.ndarray, np.ndarray]]]] = None,
+) -> List[Tuple[int, int, float]]:
+    """Firm-proposing deferred acceptance over pruned candidate lists.
+
+    ``candidates``/``scores`` are each firm's preference list, best first.
+    Each investor keeps its ``capacity`` best proposals. Firms that exhaust
+    their list are collected, and ``more(firms, depth)`` (if given) returns
+    their next candidates; the result doesn't depend on proposal order, so
+    extending lists in batches is exact. Returns (firm index, investor
+    index, score) for every matched pair.
+    """
+    n_firms = len(candidates)
+    # plain lists: the proposal loop below is pure Python
+    cand: List[List[int]] = np.asarray(candidates).tolist()
+    vals: List[List[float]] = np.asarray(scores, dtype=np.float64).tolist()
+    depth = [len(c) for c in cand]
+    next_choice = [0] * n_firms
+    held: List[List[Tuple[float, int]]] = [[] for _ in range(n_investors)]  # min-heaps of (score, -firm)
+    free = list(range(n_firms - 1, -1, -1))
+
+    while free:
+        exhausted = []
+        while free:
+            f = free.pop()
+            prefs, prefs_scores = cand[f], vals[f]
+            j, n = next_choice[f], len(prefs)
+            while j < n:
+                inv, s = prefs[j], prefs_scores[j]
+                j += 1
+                heap = held[inv]
+                if len(heap) < capacity:
+                    heapq.heappush(heap, (s, -f))
+                    break
+                # ties go to the lower firm index, so results are deterministic
+                if (s, -f) > heap[0]:
+                    _, evicted = heapq.heapreplace(heap, (s, -f))
+                    free.append(-evicted)
+                    break
+            else:
+                exhausted.append(f)
+            next_choice[f] = j
+
+        exhausted = [f for f in exhausted if depth[f] < n_investors]
+        if more is None or not exhausted:
+            break
+        exhausted.sort()
+        for f, (idx, val) in zip(exhausted, more(exhausted, [depth[f] for f in exhausted])):
+            if len(idx):
+                cand[f], vals[f], next_choice[f] = idx.tolist(), val.astype(np.float64).tolist(), 0
+                depth[f] += len(idx)
+                free.append(f)
+        free.reverse()
+
+    pairs = [(-neg_f, inv, s) for inv, heap in enumerate(held) for s, neg_f in heap]
+    pairs.sort(key=lambda p: (-p[2], p[0]))
+    return pairs
+
+
+def global_assignment(
+    investors: Sequence[Any], firms: Sequence[Any], capacity: int = 1, candidates: int = 50
+) -> List[Tuple[Any, Any, float]]:
+    """Pair firms with investors; returns (firm, investor, score) sorted by score.
+
+    Firms start with their top ``candidates`` investors and double their list
+    whenever they run out, so a firm stays unpaired only once every investor
+    is held at ``capacity`` by better firms.
+    """
+    if not investors or not firms:
+        return []
+    matrix = ScoreMatrix(investors, firms)
+    idx, val = matrix.top_candidates(candidates)
+    return [
+        (firms[f], investors[i], s)
+        for f, i, s in stable_assignment(idx, val, len(investors), capacity, matrix.next_candidates)
+    ]
+
+
+def _summary(row: Any) -> Dict[str, Any]:
+    return {"name": row.name, "email": row.email, "industry": row.industry, "location": row.location}
+
+
+def run_and_store(db: Session, capacity: int = 1, candidates: int = 50) -> AssignmentRun:
+    """Compute the global assignment over every profile and store it as the latest run."""
+    generation = current_generation(db)
+    investors = db.query(Investor).all()
+    firms = db.query(Firm).all()
+    pairs = global_assignment(investors, firms, capacity=capacity, candidates=candidates)
+    result = {
+        "pairs": [
+            {"firm": _summary(firm), "investor": _summary(investor), "match_score": float(score)}
+            for firm, investor, score in pairs
+        ],
+        "unmatched_firms": len(firms) - len(pairs),
+    }
+    run = AssignmentRun(generation=generation, capacity=capacity, candidates=candidates, result=json.dumps(result))
+    db.add(run)
+    db.commit()
+    return run
@@ -0,0 +1,30 @@
+"""Bearer-token helpers shared by the routers in main.py and app.match."""
+from typing import Any, Dict
+from uuid import UUID
+
+from fastapi import HTTPException
+from jose import jwt
+
+from app import cache
+
+
+def extract_claims(authorization: str) -> Dict[str, Any]:
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing/invalid Authorization header")
+    token = authorization.split(" ", 1)[1]
+    try:
+        # upstream must have verified token
+        claims = cache.get_claims(token, jwt.get_unverified_claims)
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if "sub" not in claims:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return claims
+
+
+def extract_sub(authorization: str) -> UUID:
+    # Cognito subs are UUIDs; the cognito_sub columns bind UUID objects, not strings
+    try:
+        return UUID(str(extract_claims(authorization)["sub"]))
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid token")
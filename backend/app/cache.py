@@ -0,0 +1,70 @@
+"""Per-worker TTL/LRU caches for decoded token claims and profile existence.
+
+Route guards hit ``/investor/exists`` / ``/firm/exists`` on every navigation;
+these caches skip the JWT decode and the DB round trip for repeat lookups.
+Negative results are cached too (with a shorter TTL) and are invalidated
+explicitly when a profile is created. A per-key version, bumped on
+invalidation, stops a lookup that straddles a create from caching its
+stale result.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from cachetools import TTLCache
+
+CLAIMS_TTL_S = float(os.getenv("CLAIMS_CACHE_TTL_S", "300"))
+EXISTS_TTL_S = float(os.getenv("EXISTS_CACHE_TTL_S", "60"))
+EXISTS_NEGATIVE_TTL_S = float(os.getenv("EXISTS_CACHE_NEGATIVE_TTL_S", "10"))
+CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", "10000"))
+
+_lock = threading.Lock()
+_claims: TTLCache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CLAIMS_TTL_S)
+_exists_positive: TTLCache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=EXISTS_TTL_S)
+_exists_negative: TTLCache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=EXISTS_NEGATIVE_TTL_S)
+# (kind, sub) -> invalidation count; one small entry per profile created on this worker
+_exists_versions: Dict[Tuple[str, str], int] = {}
+
+
+def get_claims(token: str, decode: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+    """Return decoded claims for ``token``, calling ``decode`` only on a miss."""
+    with _lock:
+        claims = _claims.get(token)
+    if claims is None:
+        claims = decode(token)
+        with _lock:
+            _claims[token] = claims
+    return claims
+
+
+def get_exists(kind: str, sub: str, lookup: Callable[[], bool]) -> bool:
+    """Return whether a ``kind`` ("investor"/"firm") profile exists for ``sub``."""
+    key = (kind, str(sub))
+    with _lock:
+        if key in _exists_positive:
+            return True
+        if key in _exists_negative:
+            return False
+        version = _exists_versions.get(key, 0)
+    exists = lookup()
+    with _lock:
+        # skip the write if a create invalidated this key while we looked it up
+        if _exists_versions.get(key, 0) == version:
+            (_exists_positive if exists else _exists_negative)[key] = True
+    return exists
+
+
+def invalidate_exists(kind: str, sub: str) -> None:
+    """Drop cached existence for ``sub``; call after a create commits."""
+    key = (kind, str(sub))
+    with _lock:
+        _exists_versions[key] = _exists_versions.get(key, 0) + 1
+        _exists_positive.pop(key, None)
+        _exists_negative.pop(key, None)
+
+
+def clear() -> None:
+    with _lock:
+        _claims.clear()
+        _exists_positive.clear()
+        _exists_negative.clear()
@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 import os
+import random
+import threading
+import time
+from typing import Callable, TypeVar
 from dotenv import load_dotenv
 
 load_dotenv()  # loads .env if present
@@ -12,18 +16,112 @@ if not DATABASE_URL:
     sqlite_path = os.path.join(BASE_DIR, "./dev.db")
     DATABASE_URL = f"sqlite:///{sqlite_path}"
 
-# For sqlite we need connect_args
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Optional read replicas, comma-separated. Locally, point this at a copy of the
+# primary sqlite file (re-copy it to simulate replication lag).
+READ_DATABASE_URLS = [u.strip() for u in os.getenv("READ_DATABASE_URLS", "").split(",") if u.strip()]
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+# How long after a write the written entity's reads stay on the primary
+REPLICA_LAG_TOLERANCE_S = float(os.getenv("REPLICA_LAG_TOLERANCE_S", "5"))
+
+# Seconds to wait when connecting to a replica, so an unreachable one fails fast
+REPLICA_CONNECT_TIMEOUT_S = int(os.getenv("REPLICA_CONNECT_TIMEOUT_S", "3"))
+
+
+def _connect_args(url: str, connect_timeout: int = 0) -> dict:
+    # For sqlite we need connect_args
+    if url.startswith("sqlite"):
+        return {"check_same_thread": False}
+    return {"connect_timeout": connect_timeout} if connect_timeout else {}
+
+
+engine = create_engine(DATABASE_URL, connect_args=_connect_args(DATABASE_URL))
+read_engines = [
+    create_engine(url, connect_args=_connect_args(url, REPLICA_CONNECT_TIMEOUT_S)) for url in READ_DATABASE_URLS
+]
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+class RoutingSession(Session):
+    """Session that sends reads to a replica and writes to the primary.
+
+    One replica is picked per session so a request sees a consistent
+    snapshot. Once the session writes (a flush, or an insert/update/delete
+    passed to ``execute``), or ``use_primary`` is called, every statement
+    goes to the primary (read-your-own-writes).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if getattr(clause, "is_dml", False):  # insert/update/delete run via execute()
+            self.info["primary"] = True
+        if not read_engines or self.info.get("primary"):
+            return engine
+        if "replica" not in self.info:
+            self.info["replica"] = random.choice(read_engines)
+        return self.info["replica"]
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _flush_to_primary(session, flush_context, instances):
+    session.info["primary"] = True
+
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=RoutingSession)
+
+_recent_writes: dict = {}
+_recent_writes_lock = threading.Lock()
+
+
+def mark_written(key) -> None:
+    """Record a committed write for ``key`` (e.g. a cognito sub)."""
+    now = time.monotonic()
+    with _recent_writes_lock:
+        _recent_writes[str(key)] = now
+        # drop entries that are past the lag window
+        if len(_recent_writes) > 10_000:
+            for k, t in list(_recent_writes.items()):
+                if now - t > REPLICA_LAG_TOLERANCE_S:
+                    del _recent_writes[k]
+
+
+def use_primary(db: Session, key=None) -> None:
+    """Route ``db`` to the primary, or only if ``key`` was written within the lag tolerance."""
+    if key is not None:
+        with _recent_writes_lock:
+            written = _recent_writes.get(str(key))
+        if written is None or time.monotonic() - written > REPLICA_LAG_TOLERANCE_S:
+            return
+    db.info["primary"] = True
+
+
+T = TypeVar("T")
+
+
+def retry_on_primary(db: Session, lookup: Callable[[], T]) -> T:
+    """Run ``lookup``; if it finds nothing on a replica, run it again on the primary.
+
+    ``mark_written`` only covers the worker that handled the write, so a
+    replica's "not found" for a just-created row isn't trusted.
+    """
+    found = lookup()
+    if not found and read_engines and not db.info.get("primary"):
+        db.info["primary"] = True
+        found = lookup()
+    return found
+
+
 # Move get_db here
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,105 @@
+"""Conditional GET support for match and listing endpoints.
+
+Every profile insert bumps a data generation counter (one row in the
+``DataGeneration`` table, updated in the insert's transaction so all workers
+see it). ETags combine that generation with the request path (which carries
+the entity id) and query params, so an unchanged dataset answers
+``If-None-Match`` with 304 before any scoring. Misses are served from a
+bounded per-worker result cache keyed by ETag; concurrent misses for the
+same ETag wait for one computation instead of each running it. The
+generation is read from the engine the result is computed on, so a
+replica that lags behind the primary doesn't mix generations into a tag.
+"""
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict
+
+from cachetools import LRUCache
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.generation import DataGeneration
+
+RESULT_CACHE_MAXSIZE = int(os.getenv("RESULT_CACHE_MAXSIZE", "512"))
+
+_results: LRUCache = LRUCache(maxsize=RESULT_CACHE_MAXSIZE)
+_results_lock = threading.Lock()
+_inflight: Dict[str, threading.Lock] = {}
+
+
+def ensure_generation_row(db: Session) -> None:
+    if db.get(DataGeneration, 1) is None:
+        db.add(DataGeneration(id=1, value=0))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # another worker created it first
+
+
+def bump_generation(db: Session) -> None:
+    """Increment the generation; commits with the caller's transaction."""
+    db.execute(update(DataGeneration).where(DataGeneration.id == 1).values(value=DataGeneration.value + 1))
+
+
+def current_generation(db: Session) -> int:
+    return db.execute(select(DataGeneration.value).where(DataGeneration.id == 1)).scalar() or 0
+
+
+def make_etag(generation: int, request: Request) -> str:
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{params}".encode()).hexdigest()[:16]
+    return f'"g{generation}-{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def stored_response(request: Request, etag: str, content: Any) -> Response:
+    """Serve precomputed ``content`` under ``etag``, answering 304 if the client has it."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+
+def conditional_response(request: Request, db: Session, compute: Callable[[], Any]) -> Response:
+    """Answer with 304 if the client's ETag is current, else the (cached) result of ``compute``."""
+    etag = make_etag(current_generation(db), request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    with _results_lock:
+        content = _results.get(etag)
+        if content is None:
+            flight = _inflight.setdefault(etag, threading.Lock())
+    if content is None:
+        key = etag
+        with flight:
+            with _results_lock:
+                content = _results.get(key)
+            if content is None:
+                try:
+                    bind = db.get_bind()
+                    content = jsonable_encoder(compute())
+                    if db.get_bind() is not bind:
+                        # compute moved to the primary (retry_on_primary), so tag the
+                        # result with the generation of the data it was computed from
+                        etag = make_etag(current_generation(db), request)
+                        headers["ETag"] = etag
+                    with _results_lock:
+                        _results[etag] = content
+                finally:
+                    with _results_lock:
+                        if _inflight.get(key) is flight:
+                            del _inflight[key]
+    return JSONResponse(content=content, headers=headers)
@@ -0,0 +1,85 @@
+"""Local stand-ins for Whisper and Gemini, used for load testing.
+
+Selected with ``TRANSCRIPTION_BACKEND=fake`` / ``LLM_BACKEND=fake``. Each fake
+sleeps for a duration drawn from a configurable latency distribution so the
+API can be driven at realistic speeds without real transcription or LLM calls.
+
+Latency specs look like ``fixed:0.5``, ``uniform:0.2,1.0``, ``normal:0.5,0.1``,
+``lognormal:0.5,0.4`` (median, sigma) or ``exp:0.5`` (mean), in seconds.
+"""
+import itertools
+import json
+import math
+import random
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+FAKE_TRANSCRIPT = (
+    "Hi, we are a seed stage fintech company based in Toronto. "
+    "We have been active for three years and are raising two and a half million dollars."
+)
+
+_counter = itertools.count(1)
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Turn a latency spec into a zero-arg sampler returning seconds (never negative)."""
+    kind, _, args = (spec or "fixed:0").partition(":")
+    params = [float(a) for a in args.split(",") if a.strip()]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        sample = lambda: params[0]
+    elif kind == "uniform":
+        sample = lambda: random.uniform(params[0], params[1])
+    elif kind == "normal":
+        sample = lambda: random.gauss(params[0], params[1])
+    elif kind == "lognormal":
+        sample = lambda: random.lognormvariate(math.log(params[0]), params[1])
+    elif kind == "exp":
+        sample = lambda: random.expovariate(1.0 / params[0])
+    else:
+        raise ValueError(f"Unknown latency distribution: {spec!r}")
+    return lambda: max(0.0, sample())
+
+
+class FakeWhisperModel:
+    """Mimics ``faster_whisper.WhisperModel.transcribe``."""
+
+    def __init__(self, latency: str = "fixed:0"):
+        self._latency = parse_latency(latency)
+
+    def transcribe(self, audio, **kwargs):
+        elapsed = self._latency()
+        time.sleep(elapsed)
+        segments = iter([SimpleNamespace(text=FAKE_TRANSCRIPT)])
+        info = SimpleNamespace(language="en", duration=elapsed)
+        return segments, info
+
+
+class FakeGenerativeModel:
+    """Mimics ``genai.GenerativeModel.generate_content`` for the firm extraction prompt."""
+
+    def __init__(self, latency: str = "fixed:0"):
+        self._latency = parse_latency(latency)
+
+    def generate_content(self, prompt):
+        time.sleep(self._latency())
+        n = next(_counter)
+        data = {
+            "name": f"Load Test Firm {n}",
+            "risk_tolerance": random.choice(["Low", "Medium", "High"]),
+            "industry": random.choice(["Fintech", "Healthcare", "AI", "Climate"]),
+            "years_active": random.randint(0, 15),
+            "num_investments": random.randint(0, 50),
+            "board_seat": random.choice([True, False, None]),
+            "location": random.choice(["Toronto", "Vancouver", "New York", "San Francisco"]),
+            "investment_size": random.choice([250_000, 1_000_000, 2_500_000, 10_000_000]),
+            "investment_stage": random.choice(["Pre-seed", "Seed", "Series A", "Series B+"]),
+            "follow_on_rate": random.choice([True, False, None]),
+            "rate_of_return": f"{random.randint(5, 40)}%",
+            "success_rate": f"{random.randint(10, 90)}%",
+            "reserved_capital": random.choice(["500K", "1M", "5M"]),
+            "meeting_frequency": random.choice(["Weekly", "Monthly", "Quarterly"]),
+        }
+        return SimpleNamespace(text=json.dumps(data))
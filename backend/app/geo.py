@@ -0,0 +1,243 @@
+"""Offline location resolution and a spatial index for distance-aware matching.
+
+Free-form ``location`` strings ("Toronto", "Toronto, ON", "NYC") are resolved
+at write time against the bundled gazetteer (``app/data/gazetteer.csv``) and
+stored as ``latitude``/``longitude``. Points are indexed in a KD-tree over
+unit-sphere vectors, so "within N km" queries are logarithmic in the table
+size instead of a full scan.
+"""
+import csv
+import math
+import os
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# (max distance km, points); the first band that fits wins
+LOCATION_BANDS = ((50, 10), (150, 6), (400, 3))
+
+INDEX_TTL_S = float(os.getenv("LOCATION_INDEX_TTL_S", "60"))
+
+_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.csv")
+
+_ALIASES = {
+    "nyc": "new york", "new york city": "new york", "manhattan": "new york",
+    "sf": "san francisco", "san fran": "san francisco", "bay area": "san francisco",
+    "silicon valley": "palo alto", "la": "los angeles", "dc": "washington",
+    "washington dc": "washington", "philly": "philadelphia", "vegas": "las vegas",
+    "gta": "toronto", "greater toronto area": "toronto", "kw": "kitchener",
+    "bengaluru": "bangalore", "new delhi": "delhi", "bombay": "mumbai",
+    "saint louis": "st louis",
+}
+
+_QUALIFIER_ALIASES = {
+    "united states": {"us", "usa", "u s", "u s a", "united states of america", "america"},
+    "united kingdom": {"uk", "u k", "gb", "great britain", "britain"},
+    "united arab emirates": {"uae"},
+    "canada": {"ca", "can"},
+    "on": {"ontario"}, "qc": {"quebec"}, "bc": {"british columbia"}, "ab": {"alberta"},
+    "mb": {"manitoba"}, "sk": {"saskatchewan"}, "ns": {"nova scotia"},
+    "nb": {"new brunswick"}, "nl": {"newfoundland", "newfoundland and labrador"},
+    "pe": {"pei", "prince edward island"},
+    "ny": {"new york"}, "ca": {"california"}, "il": {"illinois"}, "tx": {"texas"},
+    "az": {"arizona"}, "pa": {"pennsylvania"}, "fl": {"florida"}, "oh": {"ohio"},
+    "nc": {"north carolina"}, "in": {"indiana"}, "wa": {"washington"},
+    "co": {"colorado"}, "dc": {"district of columbia"}, "ma": {"massachusetts"},
+    "tn": {"tennessee"}, "mi": {"michigan"}, "or": {"oregon"}, "nv": {"nevada"},
+    "ga": {"georgia"}, "mn": {"minnesota"}, "ut": {"utah"}, "md": {"maryland"},
+    "nj": {"new jersey"}, "wi": {"wisconsin"}, "mo": {"missouri"}, "la": {"louisiana"},
+    "hi": {"hawaii"}, "nsw": {"new south wales"}, "vic": {"victoria"}, "qld": {"queensland"},
+}
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = text.lower().replace(".", "").replace("'", "")
+    return " ".join(text.replace(",", " , ").split())
+
+
+def _qualifiers(*values: str) -> frozenset:
+    out = set()
+    for v in values:
+        v = _normalize(v) if v else ""
+        if v:
+            out.add(v)
+            out |= _QUALIFIER_ALIASES.get(v, set())
+    return frozenset(out)
+
+
+@lru_cache(maxsize=1)
+def _gazetteer() -> Dict[str, List[Tuple[frozenset, float, float]]]:
+    """City name -> [(qualifiers, lat, lon)], most prominent first."""
+    by_name: Dict[str, List[Tuple[frozenset, float, float]]] = {}
+    with open(_GAZETTEER_PATH, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            by_name.setdefault(_normalize(row["name"]), []).append(
+                (_qualifiers(row["region"], row["country"]), float(row["latitude"]), float(row["longitude"]))
+            )
+    return by_name
+
+
+@lru_cache(maxsize=4096)
+def resolve_location(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Resolve a free-form location to (lat, lon), or None if it isn't in the gazetteer."""
+    if not text:
+        return None
+    gazetteer = _gazetteer()
+    parts = [p.strip() for p in _normalize(text).split(",") if p.strip()]
+    if not parts:
+        return None
+    words = parts[0].split()
+    # "Toronto ON" / "San Francisco CA": try the longest leading run of words that names a city
+    for n in range(len(words), 0, -1):
+        name = " ".join(words[:n])
+        name = _ALIASES.get(name, name)
+        candidates = gazetteer.get(name)
+        if candidates:
+            qualifiers = set(parts[1:])
+            if n < len(words):
+                qualifiers.add(" ".join(words[n:]))
+            if not qualifiers:
+                return candidates[0][1], candidates[0][2]
+            for quals, lat, lon in candidates:
+                if quals & qualifiers:
+                    return lat, lon
+            # a qualifier we can't place ("Portland, ME") must not fall back to
+            # another city of that name; scoring then compares names instead
+            return None
+    return None
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def location_points(km: float) -> int:
+    for max_km, points in LOCATION_BANDS:
+        if km <= max_km:
+            return points
+    return 0
+
+
+def _unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+class KDTree:
+    """Static KD-tree over 3-D points with radius queries."""
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 16):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.order = np.arange(len(self.points))
+        self.leaf_size = leaf_size
+        # node: (lo, hi, axis, split, left, right); axis == -1 marks a leaf
+        self.nodes: List[Tuple[int, int, int, float, int, int]] = []
+        if len(self.points):
+            self._build(0, len(self.points))
+
+    def _build(self, lo: int, hi: int) -> int:
+        node = len(self.nodes)
+        self.nodes.append((lo, hi, -1, 0.0, -1, -1))
+        if hi - lo <= self.leaf_size:
+            return node
+        idx = self.order[lo:hi]
+        pts = self.points[idx]
+        axis = int(np.argmax(pts.max(axis=0) - pts.min(axis=0)))
+        self.order[lo:hi] = idx[np.argsort(pts[:, axis], kind="stable")]
+        mid = (lo + hi) // 2
+        split = float(self.points[self.order[mid], axis])
+        left = self._build(lo, mid)
+        right = self._build(mid, hi)
+        self.nodes[node] = (lo, hi, axis, split, left, right)
+        return node
+
+    def query_radius(self, point: Sequence[float], radius: float) -> np.ndarray:
+        """Indices of points within Euclidean ``radius`` of ``point``."""
+        if not self.nodes:
+            return np.empty(0, dtype=np.int64)
+        q = np.asarray(point, dtype=np.float64)
+        hits = []
+        stack = [0]
+        while stack:
+            lo, hi, axis, split, left, right = self.nodes[stack.pop()]
+            if axis < 0:
+                idx = self.order[lo:hi]
+                d2 = ((self.points[idx] - q) ** 2).sum(axis=1)
+                hits.append(idx[d2 <= radius * radius])
+                continue
+            if q[axis] - radius <= split:
+                stack.append(left)
+            if q[axis] + radius >= split:
+                stack.append(right)
+        return np.concatenate(hits) if hits else np.empty(0, dtype=np.int64)
+
+
+class LocationIndex:
+    """Per-worker spatial index of (key, lat, lon) rows, rebuilt lazily.
+
+    Rebuilds when marked dirty by a local write, when the caller passes a
+    newer data generation, or after ``INDEX_TTL_S`` to pick up rows written
+    by other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (keys, lat, lon, tree), swapped atomically so readers never see a half-built index
+        self._snapshot = None
+        self._built_at = 0.0
+        self._generation = None
+        self._dirty = True
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def _fresh(self, generation: Optional[int]) -> bool:
+        if self._dirty or time.monotonic() - self._built_at >= INDEX_TTL_S:
+            return False
+        # an older generation (a lagging replica) is already covered by this snapshot
+        return generation is None or (self._generation is not None and generation <= self._generation)
+
+    def _ensure(self, load: Callable[[], Iterable[Tuple[object, float, float]]], generation: Optional[int]):
+        if self._fresh(generation):
+            return self._snapshot
+        with self._lock:
+            if self._fresh(generation):
+                return self._snapshot
+            self._dirty = False
+            self._generation = generation
+            rows = [r for r in load() if r[1] is not None and r[2] is not None]
+            lat = np.array([r[1] for r in rows], dtype=np.float64)
+            lon = np.array([r[2] for r in rows], dtype=np.float64)
+            self._snapshot = ([r[0] for r in rows], lat, lon, KDTree(_unit_vectors(lat, lon)))
+            self._built_at = time.monotonic()
+            return self._snapshot
+
+    def within(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        load: Callable[[], Iterable[Tuple[object, float, float]]],
+        generation: Optional[int] = None,
+    ) -> List[Tuple[object, float]]:
+        """(key, distance km) for every row within ``radius_km``, nearest first."""
+        keys, lats, lons, tree = self._ensure(load, generation)
+        # great-circle distance -> straight-line chord on the unit sphere
+        chord = 2 * math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2)
+        idx = tree.query_radius(_unit_vectors(np.array([lat]), np.array([lon]))[0], chord)
+        found = [(keys[i], haversine_km(lat, lon, lats[i], lons[i])) for i in idx]
+        found.sort(key=lambda r: r[1])
+        return found
+
+
+investor_index = LocationIndex()
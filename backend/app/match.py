@@ -1,12 +1,17 @@
+import json
 from typing import List, Any, Dict, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_read_db, retry_on_primary, use_primary
+from app.auth import extract_sub
+from app.etag import conditional_response, current_generation, stored_response
+from app.geo import haversine_km, investor_index, location_points
 from app.models.investor import Investor
 from app.models.firm import Firm
+from app.models.assignment_run import AssignmentRun
 
 # Router
 router = APIRouter()
@@ -58,8 +63,12 @@ def calculate_investor_match_score(investor: Investor, firm: Firm) -> Tuple[floa
         score += 10
 
 
-    # Location match (20 points)
-    if investor.location and firm.location:
+    # Location match (20 points): distance band when both resolved, else exact name
+    if (investor.latitude is not None and investor.longitude is not None and
+            firm.latitude is not None and firm.longitude is not None):
+        score += location_points(haversine_km(investor.latitude, investor.longitude,
+                                              firm.latitude, firm.longitude))
+    elif investor.location and firm.location:
         if investor.location.lower() == firm.location.lower():
             score += 10
 
@@ -154,8 +163,9 @@ def format_amount(amount: float) -> str:
 
 @router.get("/firms/{firm_id}/matching-investors")
 def get_matching_investors(
+    request: Request,
     firm_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get top N investors that match with a specific firm.
@@ -164,39 +174,52 @@ def get_matching_investors(
     - **limit**: Maximum number of matches to return (default: 10)
     - **min_score**: Minimum match score threshold (0-100, default: 0)
     """
-    # Get the firm
-    firm = db.query(Firm).filter(Firm.cognito_sub == firm_id).first()
-    if not firm:
-        raise HTTPException(status_code=404, detail="Firm not found")
-
-    # Get all investors and calculate match scores
-    investors = db.query(Investor).all()
-    matches = []
-
-    for investor in investors:
-        score = calculate_investor_match_score(investor, firm)
-
-        matches.append({
-            "investor": {
-                "name": investor.name,
-                "email": investor.email,
-                "num_investments": investor.num_investments,
-                "industry": investor.industry,
-                "location": investor.location,
-            },
-            "match_score": score
-        })
-
-    # Sort by score descending
-    matches.sort(key=lambda x: x["match_score"], reverse=True)
-
-    return matches[:5]
+    use_primary(db, firm_id)
+
+    def compute():
+        # Get the firm
+        firm = retry_on_primary(db, lambda: db.query(Firm).filter(Firm.cognito_sub == firm_id).first())
+        if not firm:
+            raise HTTPException(status_code=404, detail="Firm not found")
+
+        # imported here: app.sharding imports this module via app.assignment
+        from app.sharding import sharded_table
+
+        # large tables: score shards in parallel and merge their top 5
+        table = sharded_table(db, Investor)
+        if table is not None:
+            scored = table.top_k(firm, 5, entity_is_firm=True)
+        else:
+            # Get all investors and calculate match scores
+            scored = [(investor, calculate_investor_match_score(investor, firm))
+                      for investor in db.query(Investor).all()]
+        matches = []
+
+        for investor, score in scored:
+            matches.append({
+                "investor": {
+                    "name": investor.name,
+                    "email": investor.email,
+                    "num_investments": investor.num_investments,
+                    "industry": investor.industry,
+                    "location": investor.location,
+                },
+                "match_score": score
+            })
+
+        # Sort by score descending
+        matches.sort(key=lambda x: x["match_score"], reverse=True)
+
+        return matches[:5]
+
+    return conditional_response(request, db, compute)
 
 
 @router.get("/investors/{investor_id}/matching-firms")
 def get_matching_firms(
+    request: Request,
     investor_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get top N firms that match with a specific investor.
@@ -205,31 +228,124 @@ def get_matching_firms(
     - **limit**: Maximum number of matches to return (default: 10)
     - **min_score**: Minimum match score threshold (0-100, default: 0)
     """
-    # Get the investor
-    # fetch investor by cognito_sub
-    investor = db.query(Investor).filter(Investor.cognito_sub == investor_id).first()
-    if not investor:
-        raise HTTPException(status_code=404, detail="Investor not found")
-
-    # Get all firms and calculate match scores
-    firms = db.query(Firm).all()
-    matches = []
-
-    for firm in firms:
-        score = calculate_investor_match_score(investor, firm)
-
-        matches.append({
-            "firm": {
-                "name": firm.name,
-                "email": firm.email,
-                "industry": firm.industry,
-                "location": firm.location,
-                "num_investments": firm.num_investments
-            },
-            "match_score": score
-        })
-
-    # Sort by score descending
-    matches.sort(key=lambda x: x["match_score"], reverse=True)
-
-    return matches[:5]
\ No newline at end of file
+    use_primary(db, investor_id)
+
+    def compute():
+        # Get the investor
+        # fetch investor by cognito_sub
+        investor = retry_on_primary(
+            db, lambda: db.query(Investor).filter(Investor.cognito_sub == investor_id).first()
+        )
+        if not investor:
+            raise HTTPException(status_code=404, detail="Investor not found")
+
+        # imported here: app.sharding imports this module via app.assignment
+        from app.sharding import sharded_table
+
+        # large tables: score shards in parallel and merge their top 5
+        table = sharded_table(db, Firm)
+        if table is not None:
+            scored = table.top_k(investor, 5, entity_is_firm=False)
+        else:
+            # Get all firms and calculate match scores
+            scored = [(firm, calculate_investor_match_score(investor, firm))
+                      for firm in db.query(Firm).all()]
+        matches = []
+
+        for firm, score in scored:
+            matches.append({
+                "firm": {
+                    "name": firm.name,
+                    "email": firm.email,
+                    "industry": firm.industry,
+                    "location": firm.location,
+                    "num_investments": firm.num_investments
+                },
+                "match_score": score
+            })
+
+        # Sort by score descending
+        matches.sort(key=lambda x: x["match_score"], reverse=True)
+
+        return matches[:5]
+
+    return conditional_response(request, db, compute)
+
+
+@router.get("/firms/{firm_id}/nearby-investors")
+def get_nearby_investors(
+    request: Request,
+    firm_id: UUID,
+    radius_km: float = Query(100, gt=0, le=20_000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get investors located within a radius of a specific firm, nearest first.
+
+    - **firm_id**: ID of the firm to search around
+    - **radius_km**: Search radius in kilometres (default: 100)
+    """
+    use_primary(db, firm_id)
+
+    def compute():
+        firm = retry_on_primary(db, lambda: db.query(Firm).filter(Firm.cognito_sub == firm_id).first())
+        if not firm:
+            raise HTTPException(status_code=404, detail="Firm not found")
+        if firm.latitude is None or firm.longitude is None:
+            raise HTTPException(status_code=400, detail="Firm location could not be resolved")
+
+        nearby = investor_index.within(
+            firm.latitude,
+            firm.longitude,
+            radius_km,
+            lambda: db.query(Investor.cognito_sub, Investor.latitude, Investor.longitude).all(),
+            generation=current_generation(db),
+        )
+        if not nearby:
+            return []
+        distances = dict(nearby)
+        investors = db.query(Investor).filter(Investor.cognito_sub.in_(list(distances))).all()
+        investors.sort(key=lambda investor: distances[investor.cognito_sub])
+
+        return [
+            {
+                "investor": {
+                    "name": investor.name,
+                    "email": investor.email,
+                    "industry": investor.industry,
+                    "location": investor.location,
+                },
+                "distance_km": round(distances[investor.cognito_sub], 1),
+            }
+            for investor in investors
+        ]
+
+    return conditional_response(request, db, compute)
+
+
+@router.get("/matching/assignment")
+def get_global_assignment(
+    request: Request,
+    authorization: str = Header(..., alias="Authorization"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    The latest stored platform-wide pairing of firms with investors.
+
+    Runs are computed offline by scripts/run_assignment.py (the full
+    assignment takes tens of seconds at 20k x 20k), so this only reads the
+    stored result. Firms go unpaired only when investor capacity runs out.
+    """
+    extract_sub(authorization)
+
+    run = db.query(AssignmentRun).order_by(AssignmentRun.id.desc()).first()
+    if run is None:
+        raise HTTPException(status_code=404, detail="No assignment has been computed yet")
+
+    content = {
+        **json.loads(run.result),
+        "capacity": run.capacity,
+        "generation": run.generation,
+        "computed_at": run.created_at.isoformat() if run.created_at else None,
+    }
+    return stored_response(request, f'"a{run.id}"', content)
@@ -1,3 +1,5 @@
 from app.database import Base
 from .investor import Investor
-from .firm import Firm
\ No newline at end of file
+from .firm import Firm
+from .generation import DataGeneration
+from .assignment_run import AssignmentRun
\ No newline at end of file
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, Integer, Text, func
+from app.database import Base
+
+
+class AssignmentRun(Base):
+    """A stored global firm/investor assignment, computed by scripts/run_assignment.py."""
+    __tablename__ = "AssignmentRuns"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    generation = Column(Integer, nullable=False)  # data generation the run was computed from
+    capacity = Column(Integer, nullable=False)
+    candidates = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    result = Column(Text, nullable=False)  # JSON: {"pairs": [...], "unmatched_firms": n}
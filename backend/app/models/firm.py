@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, String, Integer
+from sqlalchemy import Boolean, Column, Float, String, Integer
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.database import Base
@@ -16,6 +16,8 @@ class Firm(Base):
     num_investments = Column(Integer, nullable=True)
     board_seat = Column(Boolean, nullable=True) # yes or no/true or false
     location = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True) # resolved from location at write time
+    longitude = Column(Float, nullable=True)
     investment_size = Column(Integer, nullable=True)
     investment_stage = Column(String, nullable=True) # Pre-seed, Seed, Series A, Series B+, Publi
     follow_on_rate = Column(Boolean, nullable=True)
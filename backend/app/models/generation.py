@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer
+from app.database import Base
+
+
+class DataGeneration(Base):
+    """Single-row counter bumped on every profile insert; feeds match/listing ETags."""
+    __tablename__ = "DataGeneration"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
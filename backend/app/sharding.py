@@ -0,0 +1,184 @@
+"""Sharded, parallel top-K for the per-entity match endpoints.
+
+Above ``MATCH_SHARD_THRESHOLD`` rows, the opposite-side table is split into
+contiguous shards whose column arrays are kept in memory. A request scores
+its one entity against every shard on a persistent thread pool (the numpy
+kernels release the GIL, and the only shared state written while scoring is
+the scorer's lock-guarded caches, so this also holds under free-threading),
+takes a local top-K per shard and merges them with a k-way heap. Smaller
+tables keep the sequential scalar loop, which is cheaper than the fan-out.
+
+Profiles are only ever inserted, so when the data generation moves on, the
+rows a table doesn't have yet are appended as a tail shard; the built shards
+are reused. A full rebuild (which also picks up out-of-band updates such as
+the location backfill) runs on a background thread at most every
+``MATCH_SHARD_REBUILD_S`` seconds, or once the tail outgrows a shard, while
+requests keep using the current table. A table is never replaced by one at
+an older generation, so sessions on a lagging replica don't flip it back.
+"""
+import copy
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.assignment import _Side, score_block
+from app.database import ReadSessionLocal
+from app.etag import current_generation
+
+SHARD_THRESHOLD = int(os.getenv("MATCH_SHARD_THRESHOLD", "5000"))
+SHARD_WORKERS = max(1, int(os.getenv("MATCH_SHARD_WORKERS", str(os.cpu_count() or 1))))
+SHARD_REBUILD_S = float(os.getenv("MATCH_SHARD_REBUILD_S", "60"))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+_tables: Dict[str, "ShardedTable"] = {}
+_build_locks: Dict[str, threading.Lock] = {}
+_tables_lock = threading.Lock()
+_rebuilding: set = set()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="match-shard")
+    return _pool
+
+
+def _shard_top_k(offset: int, shard: _Side, query: _Side, query_is_firm: bool, k: int) -> List[Tuple[float, int]]:
+    """(-score, row index) for the shard's ``k`` best rows, best first."""
+    scores = score_block(query, shard)[0] if query_is_firm else score_block(shard, query)[:, 0]
+    if k < len(scores):
+        # ties go to the lower row index, as with a stable sort over the whole table,
+        # so rows tied with the k-th score are picked by index, not by argpartition
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > kth)
+        idx = np.concatenate((above, np.flatnonzero(scores == kth)[:k - len(above)]))
+    else:
+        idx = np.arange(len(scores))
+    idx = idx[np.lexsort((idx, -scores[idx]))]
+    return [(-float(scores[i]), offset + int(i)) for i in idx]
+
+
+class ShardedTable:
+    """One side's rows at a data generation, split into contiguous shards.
+
+    Rows appended with ``extended`` go to a single tail shard after the
+    evenly split base shards.
+    """
+
+    def __init__(self, rows: List[Any], generation: int, n_shards: int = SHARD_WORKERS):
+        self.rows = rows
+        self.generation = generation
+        self.base_generation = generation
+        self.built_at = time.monotonic()
+        self.base = len(rows)
+        bounds = np.linspace(0, len(rows), min(n_shards, len(rows)) + 1).astype(int)
+        self.base_shards = [(int(lo), _Side(rows[lo:hi])) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self.shards = self.base_shards
+
+    def extended(self, new_rows: List[Any], generation: int) -> "ShardedTable":
+        """A copy at ``generation`` with ``new_rows`` appended; only the tail shard is rebuilt."""
+        table = copy.copy(self)
+        table.generation = generation
+        if new_rows:
+            table.rows = self.rows + new_rows
+            table.shards = self.base_shards + [(self.base, _Side(table.rows[self.base:]))]
+        return table
+
+    def needs_rebuild(self) -> bool:
+        if self.generation == self.base_generation:
+            return False
+        shard_size = self.base / max(1, len(self.base_shards))
+        return time.monotonic() - self.built_at >= SHARD_REBUILD_S or len(self.rows) - self.base > shard_size
+
+    def top_k(self, entity: Any, k: int, entity_is_firm: bool) -> List[Tuple[Any, float]]:
+        """(row, score) for the ``k`` rows scoring highest against ``entity``, best first."""
+        query = _Side([entity])
+        futures = [
+            _executor().submit(_shard_top_k, offset, shard, query, entity_is_firm, k)
+            for offset, shard in self.shards
+        ]
+        merged = heapq.merge(*(f.result() for f in futures))
+        return [(self.rows[i], -neg_score) for neg_score, i in islice(merged, k)]
+
+
+def _build_lock(name: str) -> threading.Lock:
+    with _tables_lock:
+        return _build_locks.setdefault(name, threading.Lock())
+
+
+def _missing_rows(table: ShardedTable, rows: List[Any]) -> List[Any]:
+    known = {row.cognito_sub for row in table.rows}
+    return [row for row in rows if row.cognito_sub not in known]
+
+
+def _append_new_rows(db: Session, model: Any, table: ShardedTable, generation: int) -> ShardedTable:
+    # the generation also moves for the other side's inserts; a count says whether this side grew
+    if db.query(func.count()).select_from(model).scalar() <= len(table.rows):
+        return table.extended([], generation)
+    known = {row.cognito_sub for row in table.rows}
+    new_keys = [key for key in db.execute(select(model.cognito_sub)).scalars() if key not in known]
+    new_rows = db.query(model).filter(model.cognito_sub.in_(new_keys)).all() if new_keys else []
+    return table.extended(new_rows, generation)
+
+
+def _rebuild(model: Any) -> None:
+    name = model.__tablename__
+    try:
+        with ReadSessionLocal() as db:
+            generation = current_generation(db)
+            rows = db.query(model).all()
+        table = ShardedTable(rows, generation)
+        with _build_lock(name):
+            current = _tables.get(name)
+            if current is not None and current.generation > table.generation:
+                # rows were appended while this ran (or it read a lagging replica)
+                table = table.extended(_missing_rows(table, current.rows), current.generation)
+            _tables[name] = table
+    finally:
+        with _tables_lock:
+            _rebuilding.discard(name)
+
+
+def _rebuild_in_background(model: Any) -> None:
+    name = model.__tablename__
+    with _tables_lock:
+        if name in _rebuilding:
+            return
+        _rebuilding.add(name)
+    threading.Thread(target=_rebuild, args=(model,), name=f"shard-rebuild-{name}", daemon=True).start()
+
+
+def sharded_table(db: Session, model: Any) -> Optional[ShardedTable]:
+    """The sharded table for ``model``, or None below the threshold or before the first build.
+
+    The returned table includes every row visible at the session's generation.
+    """
+    generation = current_generation(db)
+    name = model.__tablename__
+    table = _tables.get(name)
+    if table is None:
+        if db.query(func.count()).select_from(model).scalar() >= SHARD_THRESHOLD:
+            _rebuild_in_background(model)
+        return None  # the scalar loop serves until the first build lands
+
+    if generation > table.generation:
+        with _build_lock(name):
+            table = _tables[name]
+            if generation > table.generation:
+                table = _append_new_rows(db, model, table, generation)
+                _tables[name] = table
+    if table.needs_rebuild():
+        _rebuild_in_background(model)
+    return table
@@ -0,0 +1,144 @@
+"""Lazy loaders for the heavy transcription / LLM dependencies.
+
+``faster_whisper``, ``google.generativeai`` and ``ffmpeg`` are only imported
+on first use (or by the background warmup), so importing the app stays cheap
+and workers that never transcribe never pay for them.
+
+``TRANSCRIPTION_BACKEND`` ("whisper" | "fake") and ``LLM_BACKEND``
+("gemini" | "fake") swap in the stand-ins from ``app.fakes`` for load testing;
+``FAKE_TRANSCRIBE_LATENCY`` / ``FAKE_LLM_LATENCY`` tune them.
+"""
+import logging
+import os
+import shutil
+import threading
+import wave
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+WHISPER_SIZE = "small"
+_MODEL_ID = "gemini-2.5-flash"  # or "gemini-1.5-flash-002" for speed
+
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "whisper")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+_lock = threading.Lock()
+_whisper_model = None
+_genai = None
+
+
+class AudioDecodeError(RuntimeError):
+    """Raised when ffmpeg cannot decode an uploaded file."""
+
+
+def get_whisper_model():
+    """Return the shared Whisper model, loading it on first call."""
+    global _whisper_model
+    if _whisper_model is None:
+        with _lock:
+            if _whisper_model is None and TRANSCRIPTION_BACKEND == "fake":
+                from app.fakes import FakeWhisperModel
+
+                _whisper_model = FakeWhisperModel(os.getenv("FAKE_TRANSCRIBE_LATENCY", "fixed:0"))
+            elif _whisper_model is None:
+                from faster_whisper import WhisperModel
+
+                # device="auto" uses GPU if available; compute_type="auto" picks best precision
+                _whisper_model = WhisperModel(WHISPER_SIZE, device="auto", compute_type="auto")
+    return _whisper_model
+
+
+def get_genai():
+    """Return the configured ``google.generativeai`` module, configuring it on first call."""
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None and LLM_BACKEND == "fake":
+                from app import fakes
+
+                _genai = fakes
+            elif _genai is None:
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("GEMINI_API_KEY not set")
+                import google.generativeai as genai
+
+                genai.configure(api_key=api_key)
+                _genai = genai
+    return _genai
+
+
+def get_llm_model(system_instruction: str):
+    genai = get_genai()
+    if LLM_BACKEND == "fake":
+        return genai.FakeGenerativeModel(os.getenv("FAKE_LLM_LATENCY", "fixed:0"))
+    return genai.GenerativeModel(
+        _MODEL_ID,
+        system_instruction=system_instruction,
+        generation_config={"temperature": 0.1, "response_mime_type": "application/json"},
+    )
+
+
+def load_pcm_16k_mono(src_path: str):
+    """Samples as float32 if the file is already 16 kHz mono 16-bit PCM WAV, else None.
+
+    This is what the recorder uploads in compact mode; Whisper takes the
+    array directly, so no ffmpeg process is spawned.
+    """
+    try:
+        with wave.open(src_path, "rb") as wav:
+            if (wav.getnchannels(), wav.getframerate(), wav.getsampwidth(), wav.getcomptype()) != (1, 16000, 2, "NONE"):
+                return None
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    import numpy as np
+
+    return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def to_wav_16k_mono(src_path: str) -> str:
+    """Convert any audio/video to 16 kHz mono WAV for Whisper."""
+    out_path = src_path + ".wav"
+    if TRANSCRIPTION_BACKEND == "fake":
+        # the fake model ignores audio, so don't require ffmpeg or a decodable upload
+        shutil.copyfile(src_path, out_path)
+        return out_path
+
+    import ffmpeg
+
+    try:
+        (
+            ffmpeg
+            .input(src_path)
+            .output(out_path, ac=1, ar="16000", format="wav", loglevel="error")
+            .overwrite_output()
+            .run()
+        )
+    except ffmpeg.Error as e:
+        raise AudioDecodeError(e.stderr.decode() if e.stderr else "ffmpeg failed") from e
+    return out_path
+
+
+def warmup() -> None:
+    """Load every subsystem; failures are logged and left for first use to surface."""
+    for name, loader in (("llm", get_genai), ("whisper", get_whisper_model)):
+        try:
+            loader()
+        except Exception:
+            logger.exception("warmup of %s failed", name)
+
+
+def start_warmup() -> threading.Thread:
+    thread = threading.Thread(target=warmup, name="transcription-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def status() -> Dict[str, Any]:
+    return {
+        "whisper": _whisper_model is not None,
+        "llm": _genai is not None,
+    }
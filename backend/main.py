@@ -1,7 +1,7 @@
 # main.py
 
 # matching utilities and schemas
-from app.match import calculate_investor_match_score
+from app.match import router as match_router
 
 # Standard library
 import json
@@ -9,14 +9,11 @@ import logging
 import os
 import re
 import tempfile
+from contextlib import asynccontextmanager
 from typing import Any, Dict, List, Optional, Literal
 from uuid import UUID
 
 # Third-party libraries
-import ffmpeg
-import google.generativeai as genai
-from faster_whisper import WhisperModel
-from jose import jwt
 from sqlalchemy import select, text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
@@ -30,52 +27,86 @@ from fastapi import (
     Form,
     Header,
     HTTPException,
+    Request,
     UploadFile,
     FastAPI,
 )
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 # Pydantic
 from pydantic import BaseModel, EmailStr
 
 # Application modules
-from app.database import Base, engine, get_db
+from app import cache, transcription
+from app.auth import extract_claims, extract_sub
+from app.geo import investor_index, resolve_location
+from app.database import (
+    Base, SessionLocal, engine, get_db, get_read_db, mark_written, read_engines, retry_on_primary, use_primary,
+)
+from app.etag import bump_generation, conditional_response, ensure_generation_row
 from app.models.firm import Firm
 from app.models.investor import Investor
 
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+router = APIRouter()
 
-app = FastAPI()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
-    allow_credentials=True,
-    allow_methods=["GET","POST","PUT","PATCH","DELETE","OPTIONS"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create all tables
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        ensure_generation_row(db)
+    # whisper/gemini load in the background; set WARMUP_ON_STARTUP=0 to defer to first use
+    if os.getenv("WARMUP_ON_STARTUP", "1") != "0":
+        transcription.start_warmup()
+    yield
 
-# include match router if present (safe import)
-try:
-    from app.match import router as match_router
-    app.include_router(match_router)
-except Exception:
-    pass
 
-# include match router if available
-try:
-    from app.match import router as match_router
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
+        allow_credentials=True,
+        allow_methods=["GET","POST","PUT","PATCH","DELETE","OPTIONS"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(router)
     app.include_router(match_router)
-except Exception:
-    # keep app usable even if import fails in dev
-    pass
+    return app
 
-@app.get("/")
+
+@router.get("/")
 def read_root():
     return {"message": "Hello, FastAPI!"}
 
+
+@router.get("/ready")
+def readiness(db: Session = Depends(get_db)):
+    """Report which subsystems are warm. Only the database is required to serve traffic."""
+    try:
+        db.execute(text("SELECT 1"))
+        database = True
+    except Exception:
+        database = False
+    replicas = []
+    for read_engine in read_engines:
+        try:
+            with read_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            replicas.append(True)
+        except Exception:
+            replicas.append(False)
+    subsystems = {"database": database, "replicas": replicas, **transcription.status()}
+    return JSONResponse(
+        status_code=200 if database else 503,
+        content={"ready": database, "subsystems": subsystems},
+    )
+
 class InvestorCreate(BaseModel):
     name: str
     email: EmailStr
@@ -94,18 +125,30 @@ class InvestorCreate(BaseModel):
     meeting_frequency: Optional[Literal["Weekly", "Monthly", "Quarterly"]] = None
 
 
-def _extract_sub_from_auth(authorization: str) -> str:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing/invalid Authorization header")
-    token = authorization.split(" ", 1)[1]
-    try:
-        return jwt.get_unverified_claims(token)["sub"]  # upstream must have verified token
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid token")
+def _investor_exists(db: Session, sub: UUID) -> bool:
+    use_primary(db, sub)
+    return cache.get_exists(
+        "investor",
+        sub,
+        lambda: retry_on_primary(db, lambda: db.execute(
+            select(Investor.cognito_sub).where(Investor.cognito_sub == sub)
+        ).first() is not None),
+    )
+
 
+def _firm_exists(db: Session, sub: UUID) -> bool:
+    use_primary(db, sub)
+    return cache.get_exists(
+        "firm",
+        sub,
+        lambda: retry_on_primary(db, lambda: db.execute(
+            select(Firm.cognito_sub).where(Firm.cognito_sub == sub)
+        ).first() is not None),
+    )
 
 
-@app.post("/investor/create-profile")
+
+@router.post("/investor/create-profile")
 def create_investor(
     payload: InvestorCreate,
     authorization: str = Header(..., alias="Authorization"),
@@ -125,12 +168,17 @@ def create_investor(
     #     raise HTTPException(status_code=401, detail="Invalid token")
 
 
-    sub = _extract_sub_from_auth(authorization)
+    sub = extract_sub(authorization)
 
-    new_investor = Investor(**payload.dict(), cognito_sub=sub)
+    latitude, longitude = resolve_location(payload.location) or (None, None)
+    new_investor = Investor(**payload.dict(), cognito_sub=sub, latitude=latitude, longitude=longitude)
     db.add(new_investor)
+    bump_generation(db)
     try:
         db.commit()
+        mark_written(sub)
+        cache.invalidate_exists("investor", sub)
+        investor_index.mark_dirty()
         db.refresh(new_investor)
         return new_investor
     except IntegrityError:
@@ -146,14 +194,6 @@ def create_investor(
 
 # THIS IS THE TRANSCRIPTION STUFFF!!!!!
 
-# --- configure once (idempotent) ---
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("GEMINI_API_KEY not set")
-genai.configure(api_key=API_KEY)
-
-_MODEL_ID = "gemini-2.5-flash"  # or "gemini-1.5-flash-002" for speed
-
 # --- lightweight normalizers (inline; no external deps) ---
 _RISK_MAP = {
     "low": "Low", "conservative": "Low", "defensive": "Low",
@@ -223,23 +263,7 @@ def _to_int(val: Any, lo: int = 0, hi: int = 1_000_000) -> Optional[int]:
         return iv if lo <= iv <= hi else None
 
 
-WHISPER_SIZE = "small"
-# device="auto" uses GPU if available; compute_type="auto" picks best precision
-whisper_model = WhisperModel(WHISPER_SIZE, device="auto", compute_type="auto")
-
-def _to_wav_16k_mono(src_path: str) -> str:
-    """Convert any audio/video to 16 kHz mono WAV for Whisper."""
-    out_path = src_path + ".wav"
-    (
-        ffmpeg
-        .input(src_path)
-        .output(out_path, ac=1, ar="16000", format="wav", loglevel="error")
-        .overwrite_output()
-        .run()
-    )
-    return out_path
-
-@app.post("/firm/create-profile")
+@router.post("/firm/create-profile")
 async def create_firm(
     authorization: str = Header(..., alias="Authorization"),
     file: UploadFile = File(...),
@@ -248,7 +272,7 @@ async def create_firm(
 ):
     # auth
     try:
-        sub = _extract_sub_from_auth(authorization)
+        sub = extract_sub(authorization)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid Authorization header")
 
@@ -266,12 +290,15 @@ async def create_firm(
             src_path = tmp.name
             tmp.write(await file.read())
 
-        # normalize to WAV 16k mono
-        wav_path = _to_wav_16k_mono(src_path)
+        # compact uploads are already 16k mono PCM; everything else goes through ffmpeg
+        audio = transcription.load_pcm_16k_mono(src_path)
+        if audio is None:
+            wav_path = transcription.to_wav_16k_mono(src_path)
+            audio = wav_path
 
         # transcribe
-        segments, info = whisper_model.transcribe(
-            wav_path,
+        segments, info = transcription.get_whisper_model().transcribe(
+            audio,
             language=None,        # auto-detect
             vad_filter=True,      # helps on noisy/pauses
             beam_size=5,          # decent accuracy/latency tradeoff
@@ -303,11 +330,7 @@ async def create_firm(
         )
         prompt = f"Transcript:\n```\n{transcript}\n```\nJSON only."
 
-        model = genai.GenerativeModel(
-            _MODEL_ID,
-            system_instruction=sys,
-            generation_config={"temperature": 0.1, "response_mime_type": "application/json"},
-        )
+        model = transcription.get_llm_model(sys)
 
         try:
             resp = model.generate_content(prompt)
@@ -353,16 +376,20 @@ async def create_firm(
 
         print(out)
 
+        out["latitude"], out["longitude"] = resolve_location(out["location"]) or (None, None)
+
         new_firm = Firm(**out, email=email, cognito_sub=sub)
         db.add(new_firm)
+        bump_generation(db)
         db.commit()
+        mark_written(sub)
+        cache.invalidate_exists("firm", sub)
         db.refresh(new_firm)
         return new_firm
 
 
-    except ffmpeg.Error as e:
-        err = e.stderr.decode() if e.stderr else "ffmpeg failed"
-        raise HTTPException(status_code=500, detail=f"Audio decode failed: {err}")
+    except transcription.AudioDecodeError as e:
+        raise HTTPException(status_code=500, detail=f"Audio decode failed: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription failed: {e}")
     finally:
@@ -377,35 +404,50 @@ async def create_firm(
 
 
 
-@app.get("/investor/exists")
+@router.get("/investor/exists")
 def investor_exists(
     authorization: str = Header(..., alias="Authorization"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    sub = _extract_sub_from_auth(authorization)
-    exists = db.execute(
-        select(Investor.cognito_sub).where(Investor.cognito_sub == sub)
-    ).first() is not None
-    return {"exists": exists}
+    sub = extract_sub(authorization)
+    return {"exists": _investor_exists(db, sub)}
 
 
-@app.get("/firm/exists")
+@router.get("/firm/exists")
 def firm_exists(
     authorization: str = Header(..., alias="Authorization"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    sub = _extract_sub_from_auth(authorization)
-    exists = db.execute(
-        select(Firm.cognito_sub).where(Firm.cognito_sub == sub)
-    ).first() is not None
-    return {"exists": exists}
+    sub = extract_sub(authorization)
+    return {"exists": _firm_exists(db, sub)}
 
 
-@app.get("/investors/")
-def read_investors(db: Session = Depends(get_db)):
-    return db.query(Investor).all()
-
-# @app.post("/firms/")
+@router.get("/me")
+def me(
+    authorization: str = Header(..., alias="Authorization"),
+    db: Session = Depends(get_read_db),
+):
+    """Role (from the Cognito groups claim) and profile existence in one call."""
+    claims = extract_claims(authorization)
+    sub = extract_sub(authorization)
+    groups = claims.get("cognito:groups") or []
+    if "Investor" in groups:
+        role = "Investor"
+        exists = _investor_exists(db, sub)
+    elif "Firm" in groups:
+        role = "Firm"
+        exists = _firm_exists(db, sub)
+    else:
+        role = None
+        exists = _investor_exists(db, sub) or _firm_exists(db, sub)
+    return {"sub": sub, "role": role, "exists": exists}
+
+
+@router.get("/investors/")
+def read_investors(request: Request, db: Session = Depends(get_read_db)):
+    return conditional_response(request, db, lambda: db.query(Investor).all())
+
+# @router.post("/firms/")
 # def create_firm(
 #     name: str,
 #     email:str,
@@ -449,91 +491,9 @@ def read_investors(db: Session = Depends(get_db)):
 #         logging.exception("Unexpected error while creating firm")
 #         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-@app.get("/firms/")
-def read_firms(db: Session = Depends(get_db)):
-    return db.query(Firm).all()
-
-
-# Match endpoints (moved into main for easier testing)
-@app.get("/firms/{firm_id}/matching-investors")
-def get_matching_investors(
-    firm_id: UUID,
-    db: Session = Depends(get_db)
-):
-    """
-    Get top N investors that match with a specific firm.
-
-    - **firm_id**: ID of the firm to find matches for
-    - **limit**: Maximum number of matches to return (default: 10)
-    - **min_score**: Minimum match score threshold (0-100, default: 0)
-    """
-    # Get the firm
-    firm = db.query(Firm).filter(Firm.cognito_sub == firm_id).first()
-    if not firm:    
-        raise HTTPException(status_code=404, detail="Firm not found")
-
-    # Get all investors and calculate match scores
-    investors = db.query(Investor).all()
-    matches = []
-
-    for investor in investors:
-        score = calculate_investor_match_score(investor, firm)
-
-        matches.append({
-            "investor": {
-                "name": investor.name,
-                "email": investor.email,
-                "num_investments": investor.num_investments,
-                "industry": investor.industry,
-                "location": investor.location,
-            },
-            "match_score": score
-        })
-
-    # Sort by score descending
-    matches.sort(key=lambda x: x["match_score"], reverse=True)
-
-    return matches[:5]
-
-
-@app.get("/investors/{investor_id}/matching-firms")
-def get_matching_firms(
-    investor_id: UUID,
-    db: Session = Depends(get_db)
-):
-    """
-    Get top N firms that match with a specific investor.
+@router.get("/firms/")
+def read_firms(request: Request, db: Session = Depends(get_read_db)):
+    return conditional_response(request, db, lambda: db.query(Firm).all())
 
-    - **investor_id**: ID of the investor to find matches for
-    - **limit**: Maximum number of matches to return (default: 10)
-    - **min_score**: Minimum match score threshold (0-100, default: 0)
-    """
-    # Get the investor
-    # fetch investor by cognito_sub
-    investor = db.query(Investor).filter(Investor.cognito_sub == investor_id).first()
-    if not investor:
-        raise HTTPException(status_code=404, detail="Investor not found")
-
-    # Get all firms and calculate match scores
-    firms = db.query(Firm).all()
-    matches = []
-
-    for firm in firms:
-        score = calculate_investor_match_score(investor, firm)
-
-        matches.append({
-            "firm": {
-                "name": firm.name,
-                "email": firm.email,
-                "industry": firm.industry,
-                "location": firm.location,
-                "risk_tolerance": firm.risk_tolerance
-            },
-            "match_score": score
-        })
-
-    # Sort by score descending
-    matches.sort(key=lambda x: x["match_score"], reverse=True)
-
-    return matches[:5]
 
+app = create_app()
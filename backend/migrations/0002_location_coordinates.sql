@@ -0,0 +1,13 @@
+-- Migration: add resolved coordinates for distance-aware location matching
+-- Run this on your PostgreSQL database, then backfill existing rows with
+-- scripts/backfill_locations.py.
+
+BEGIN;
+
+ALTER TABLE "Investors" ADD COLUMN IF NOT EXISTS latitude double precision;
+ALTER TABLE "Investors" ADD COLUMN IF NOT EXISTS longitude double precision;
+
+ALTER TABLE "Firms" ADD COLUMN IF NOT EXISTS latitude double precision;
+ALTER TABLE "Firms" ADD COLUMN IF NOT EXISTS longitude double precision;
+
+COMMIT;
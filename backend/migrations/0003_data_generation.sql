@@ -0,0 +1,13 @@
+-- Migration: data generation counter backing ETags on match/listing endpoints
+-- Run this on your PostgreSQL database. The app also creates the row on startup.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS "DataGeneration" (
+    id integer PRIMARY KEY,
+    value integer NOT NULL DEFAULT 0
+);
+
+INSERT INTO "DataGeneration" (id, value) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- Migration: stored global assignment runs served by GET /matching/assignment
+-- Run this on your PostgreSQL database, then compute a run with
+-- scripts/run_assignment.py.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS "AssignmentRuns" (
+    id serial PRIMARY KEY,
+    generation integer NOT NULL,
+    capacity integer NOT NULL,
+    candidates integer NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    result text NOT NULL
+);
+
+COMMIT;
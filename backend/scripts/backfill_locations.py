@@ -0,0 +1,28 @@
+"""Resolve latitude/longitude for existing investors and firms.
+
+Run after migrations/0002_location_coordinates.sql. Rows whose location is
+not in the bundled gazetteer are left with NULL coordinates. Bumps the data
+generation, so workers drop cached match results and ETags.
+"""
+from app.database import SessionLocal
+from app.etag import bump_generation, ensure_generation_row
+from app.geo import resolve_location
+from app.models.firm import Firm
+from app.models.investor import Investor
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        ensure_generation_row(db)
+        for model in (Investor, Firm):
+            resolved = total = 0
+            for row in db.query(model).all():
+                total += 1
+                coords = resolve_location(row.location)
+                row.latitude, row.longitude = coords or (None, None)
+                resolved += coords is not None
+            bump_generation(db)
+            db.commit()
+            print(f"{model.__tablename__}: resolved {resolved}/{total}")
+    finally:
+        db.close()
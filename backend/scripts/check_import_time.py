@@ -0,0 +1,47 @@
+"""Check that importing ``main`` stays within the cold-start budget.
+
+Runs the import in a fresh interpreter (so nothing is cached), fails if it
+takes longer than IMPORT_BUDGET_S seconds or if any heavy ML/LLM module was
+pulled in eagerly. Run from backend/: ``python scripts/check_import_time.py``.
+"""
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET_S = float(os.getenv("IMPORT_BUDGET_S", "2.0"))
+HEAVY_MODULES = ("faster_whisper", "ctranslate2", "google.generativeai", "ffmpeg")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+elapsed = time.perf_counter() - t0
+print(json.dumps({"elapsed": elapsed, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure() -> dict:
+    import json
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    result = measure()
+    print(f"import main: {result['elapsed']:.3f}s (budget {IMPORT_BUDGET_S:.3f}s)")
+    failed = False
+    if result["elapsed"] > IMPORT_BUDGET_S:
+        print("FAIL: import time over budget")
+        failed = True
+    if result["heavy"]:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(result['heavy'])}")
+        failed = True
+    sys.exit(1 if failed else 0)
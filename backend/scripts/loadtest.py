@@ -0,0 +1,348 @@
+"""Load generator for the public API surface.
+
+Drives create-profile, exists, listings and both match endpoints with a
+weighted request mix from a pool of concurrent closed-loop workers, then
+prints p50/p90/p99 latency per operation and overall throughput.
+
+Run the server against the local stand-ins so Gemini and Whisper are never hit:
+
+    TRANSCRIPTION_BACKEND=fake LLM_BACKEND=fake \\
+    FAKE_TRANSCRIBE_LATENCY=lognormal:0.8,0.3 FAKE_LLM_LATENCY=uniform:0.3,1.2 \\
+    uvicorn main:app --workers 2
+
+    python scripts/loadtest.py --base-url http://127.0.0.1:8000 \\
+        --mix exists=4,listings=1,match_investors=3,match_firms=3,create_investor=1 \\
+        --concurrency 16 --duration 30
+
+``--in-process`` runs the app in this interpreter on a throwaway SQLite file
+(fakes enabled) instead of talking to a server. ``--sweep 1,4,16,64`` repeats
+the mix at each concurrency to find saturation throughput, and
+``--scenario upload-interference`` measures how match-read latency degrades
+while firm uploads are in flight.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from jose import jwt
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "exists=4,me=1,listings=1,match_investors=3,match_firms=3,create_investor=1"
+FAKE_UPLOAD = b"\x1a\x45\xdf\xa3" + b"\x00" * 64 * 1024  # 64 KiB of webm-ish bytes
+
+
+def _token(sub: str, group: str) -> str:
+    # the API reads claims without verifying, so any signing key works here
+    return jwt.encode({"sub": sub, "cognito:groups": [group]}, "loadtest", algorithm="HS256")
+
+
+def _auth(sub: str, group: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {_token(sub, group)}"}
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+class State:
+    """Subs created so far, shared by all workers."""
+
+    def __init__(self):
+        self.investors: List[str] = []
+        self.firms: List[str] = []
+
+
+# --- operations: each returns the HTTP status code ---
+
+async def op_create_investor(client: httpx.AsyncClient, state: State) -> int:
+    sub = str(uuid.uuid4())
+    payload = {
+        "name": f"Load Investor {sub[:8]}",
+        "email": f"investor-{sub}@loadtest.example.com",
+        "risk_tolerance": random.choice(["Low", "Medium", "High"]),
+        "industry": random.choice(["Fintech", "Healthcare", "AI", "Climate"]),
+        "years_active": random.randint(0, 30),
+        "num_investments": random.randint(0, 100),
+        "board_seat": random.choice([True, False]),
+        "location": random.choice(["Toronto", "Vancouver", "New York", "San Francisco"]),
+        "investment_size": random.choice([250_000, 1_000_000, 5_000_000]),
+        "investment_stage": random.choice(["Pre-seed", "Seed", "Series A", "Series B+"]),
+        "follow_on_rate": random.choice([True, False]),
+        "rate_of_return": f"{random.randint(5, 40)}%",
+        "success_rate": f"{random.randint(10, 90)}%",
+        "reserved_capital": random.choice(["500K", "1M", "5M"]),
+        "meeting_frequency": random.choice(["Weekly", "Monthly", "Quarterly"]),
+    }
+    r = await client.post("/investor/create-profile", json=payload, headers=_auth(sub, "Investor"))
+    if r.status_code == 200:
+        state.investors.append(sub)
+    return r.status_code
+
+
+async def op_create_firm(client: httpx.AsyncClient, state: State) -> int:
+    sub = str(uuid.uuid4())
+    r = await client.post(
+        "/firm/create-profile",
+        headers=_auth(sub, "Firm"),
+        data={"email": f"firm-{sub}@loadtest.example.com"},
+        files={"file": ("pitch.webm", FAKE_UPLOAD, "audio/webm")},
+        timeout=120,
+    )
+    if r.status_code == 200:
+        state.firms.append(sub)
+    return r.status_code
+
+
+async def op_exists(client: httpx.AsyncClient, state: State) -> int:
+    if state.firms and (not state.investors or random.random() < 0.5):
+        r = await client.get("/firm/exists", headers=_auth(random.choice(state.firms), "Firm"))
+    else:
+        r = await client.get("/investor/exists", headers=_auth(random.choice(state.investors), "Investor"))
+    return r.status_code
+
+
+async def op_me(client: httpx.AsyncClient, state: State) -> int:
+    r = await client.get("/me", headers=_auth(random.choice(state.investors), "Investor"))
+    return r.status_code
+
+
+async def op_listings(client: httpx.AsyncClient, state: State) -> int:
+    r = await client.get(random.choice(["/investors/", "/firms/"]))
+    return r.status_code
+
+
+async def op_match_investors(client: httpx.AsyncClient, state: State) -> int:
+    r = await client.get(f"/firms/{random.choice(state.firms)}/matching-investors")
+    return r.status_code
+
+
+async def op_match_firms(client: httpx.AsyncClient, state: State) -> int:
+    r = await client.get(f"/investors/{random.choice(state.investors)}/matching-firms")
+    return r.status_code
+
+
+OPERATIONS = {
+    "create_investor": op_create_investor,
+    "create_firm": op_create_firm,
+    "exists": op_exists,
+    "me": op_me,
+    "listings": op_listings,
+    "match_investors": op_match_investors,
+    "match_firms": op_match_firms,
+}
+
+
+# --- driver ---
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    async def run(self, name: str, client: httpx.AsyncClient, state: State) -> None:
+        t0 = time.perf_counter()
+        try:
+            status = await OPERATIONS[name](client, state)
+        except httpx.HTTPError:
+            status = 0
+        self.samples[name].append(time.perf_counter() - t0)
+        if status != 200:
+            self.errors[name] += 1
+
+    def report(self) -> Dict[str, dict]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        ops = {}
+        for name, lat in sorted(self.samples.items()):
+            ops[name] = {
+                "count": len(lat),
+                "errors": self.errors[name],
+                "p50_ms": _pct(lat, 50) * 1000,
+                "p90_ms": _pct(lat, 90) * 1000,
+                "p99_ms": _pct(lat, 99) * 1000,
+                "max_ms": max(lat) * 1000,
+                "rps": len(lat) / elapsed if elapsed else 0.0,
+            }
+        total = sum(len(v) for v in self.samples.values())
+        return {"elapsed_s": elapsed, "requests": total, "rps": total / elapsed if elapsed else 0.0, "ops": ops}
+
+
+def _pct(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+async def run_mix(
+    client: httpx.AsyncClient,
+    state: State,
+    mix: List[Tuple[str, float]],
+    concurrency: int,
+    duration: float,
+) -> Recorder:
+    names = [n for n, _ in mix]
+    weights = [w for _, w in mix]
+    rec = Recorder()
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await rec.run(random.choices(names, weights)[0], client, state)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    rec.finished = time.perf_counter()
+    return rec
+
+
+async def seed(client: httpx.AsyncClient, state: State, investors: int, firms: int, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(op):
+        async with sem:
+            await op(client, state)
+
+    await asyncio.gather(
+        *(one(op_create_investor) for _ in range(investors)),
+        *(one(op_create_firm) for _ in range(firms)),
+    )
+    if not state.investors or not state.firms:
+        raise SystemExit("seeding failed: is the server running with TRANSCRIPTION_BACKEND=fake LLM_BACKEND=fake?")
+
+
+async def upload_interference(client: httpx.AsyncClient, state: State, args) -> Dict[str, dict]:
+    """Match-read latency alone vs. with ``--uploaders`` concurrent firm uploads."""
+    reads = [("match_investors", 1.0), ("match_firms", 1.0)]
+    baseline = await run_mix(client, state, reads, args.concurrency, args.duration)
+
+    stop = asyncio.Event()
+    uploads = Recorder()
+
+    async def uploader():
+        while not stop.is_set():
+            await uploads.run("create_firm", client, state)
+
+    upload_tasks = [asyncio.create_task(uploader()) for _ in range(args.uploaders)]
+    loaded = await run_mix(client, state, reads, args.concurrency, args.duration)
+    stop.set()
+    await asyncio.gather(*upload_tasks)
+    uploads.finished = time.perf_counter()
+
+    base, under = baseline.report(), loaded.report()
+    degradation = {}
+    for name in base["ops"]:
+        if name in under["ops"]:
+            degradation[name] = {
+                f"{p}_ratio": under["ops"][name][f"{p}_ms"] / base["ops"][name][f"{p}_ms"]
+                for p in ("p50", "p99")
+            }
+    return {"baseline": base, "with_uploads": under, "uploads": uploads.report(), "degradation": degradation}
+
+
+def print_report(title: str, report: dict) -> None:
+    print(f"\n== {title}: {report['requests']} requests in {report['elapsed_s']:.1f}s, {report['rps']:.1f} req/s")
+    print(f"{'operation':<18}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'req/s':>9}")
+    for name, s in report["ops"].items():
+        print(
+            f"{name:<18}{s['count']:>8}{s['errors']:>8}{s['p50_ms']:>10.1f}{s['p90_ms']:>10.1f}"
+            f"{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}{s['rps']:>9.1f}"
+        )
+
+
+def _in_process_client() -> Tuple[httpx.AsyncClient, object]:
+    os.environ.setdefault("TRANSCRIPTION_BACKEND", "fake")
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    if "DATABASE_URL" not in os.environ:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "loadtest.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60), main.app
+
+
+async def main_async(args) -> dict:
+    if args.in_process:
+        client, app = _in_process_client()
+        lifespan = app.router.lifespan_context(app)
+    else:
+        client = httpx.AsyncClient(
+            base_url=args.base_url,
+            timeout=60,
+            limits=httpx.Limits(max_connections=args.concurrency + args.uploaders + 8),
+        )
+        lifespan = None
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            state = State()
+            await seed(client, state, args.seed_investors, args.seed_firms, args.concurrency)
+
+            if args.scenario == "upload-interference":
+                result = await upload_interference(client, state, args)
+                print_report("match reads (baseline)", result["baseline"])
+                print_report(f"match reads with {args.uploaders} uploaders", result["with_uploads"])
+                print_report("uploads", result["uploads"])
+                print("\n== degradation (with uploads / baseline)")
+                for name, ratios in result["degradation"].items():
+                    print(f"{name:<18} p50 x{ratios['p50_ratio']:.2f}  p99 x{ratios['p99_ratio']:.2f}")
+                return result
+
+            mix = parse_mix(args.mix)
+            levels = [int(c) for c in args.sweep.split(",")] if args.sweep else [args.concurrency]
+            result = {}
+            for level in levels:
+                rec = await run_mix(client, state, mix, level, args.duration)
+                result[str(level)] = rec.report()
+                print_report(f"concurrency {level}", result[str(level)])
+            if len(levels) > 1:
+                best = max(result, key=lambda k: result[k]["rps"])
+                print(f"\nsaturation: {result[best]['rps']:.1f} req/s at concurrency {best}")
+            return result
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p.add_argument("--in-process", action="store_true", help="run the app in-process on a temp SQLite DB")
+    p.add_argument("--scenario", choices=["mix", "upload-interference"], default="mix")
+    p.add_argument("--mix", default=DEFAULT_MIX, help=f"op=weight,... (ops: {', '.join(OPERATIONS)})")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--sweep", help="comma-separated concurrency levels, e.g. 1,4,16,64")
+    p.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    p.add_argument("--uploaders", type=int, default=2, help="concurrent uploads for upload-interference")
+    p.add_argument("--seed-investors", type=int, default=200)
+    p.add_argument("--seed-firms", type=int, default=50)
+    p.add_argument("--json", dest="json_path", help="also write the report as JSON here")
+    return p
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    report = asyncio.run(main_async(args))
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(report, fh, indent=2)
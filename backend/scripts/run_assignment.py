@@ -0,0 +1,26 @@
+"""Compute the global firm/investor assignment and store it for GET /matching/assignment.
+
+Run from backend/ after migrations/0004_assignment_runs.sql, e.g. on a
+schedule or after a bulk import:
+
+    python scripts/run_assignment.py --capacity 1 --candidates 50
+"""
+import argparse
+import time
+
+from app.assignment import run_and_store
+from app.database import SessionLocal
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--capacity", type=int, default=1, help="max firms assigned to one investor")
+    parser.add_argument("--candidates", type=int, default=50, help="investors each firm starts with")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        run = run_and_store(db, capacity=args.capacity, candidates=args.candidates)
+        print(f"run {run.id}: generation {run.generation}, {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
@@ -0,0 +1,8 @@
+"""Importing ``main`` must stay within the cold-start budget (see scripts/check_import_time.py)."""
+from scripts.check_import_time import IMPORT_BUDGET_S, measure
+
+
+def test_import_main_within_budget():
+    result = measure()
+    assert result["elapsed"] <= IMPORT_BUDGET_S, f"import main took {result['elapsed']:.3f}s"
+    assert result["heavy"] == [], f"heavy modules imported eagerly: {result['heavy']}"
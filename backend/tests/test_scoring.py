@@ -0,0 +1,113 @@
+"""The vectorized and sharded match paths must agree with ``calculate_investor_match_score``.
+
+Above ``MATCH_SHARD_THRESHOLD`` the match endpoints score with
+``score_block`` instead of the scalar scorer, so any edit to the scalar
+rules has to be mirrored there; these tests catch the drift.
+"""
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.assignment import _Side, score_block
+from app.match import calculate_investor_match_score
+from app.sharding import ShardedTable
+
+# few distinct values per field, so scores tie often
+CHOICES = {
+    "industry": [None, "", "Fintech", "fintech", "Fin", "AI", "AI/ML", "ai", "Health", "HEALTHCARE"],
+    "risk_tolerance": [None, "", "low", "Low", "medium", "Medium", "high", "HIGH", "very high"],
+    "years_active": [None, 0, 1, 3, 5, 10],
+    "num_investments": [None, 0, 2, 3, 5, 9],
+    "board_seat": [None, False, True],
+    "location": [None, "", "Toronto", "toronto", "NYC", "Waterloo"],
+    "investment_size": [None, 0, 10, 20, 50],
+    "investment_stage": [None, "Seed", "seed", "Series A"],
+    "follow_on_rate": [None, False, True],
+    "rate_of_return": [None, "10%", "8%", "-5%", "x%", "12"],
+    "success_rate": [None, "50%", "70%", "bad%"],
+    "reserved_capital": [None, "1M", "500K", "2.5M", 2_000_000, "bad"],
+    "meeting_frequency": [None, "weekly", "Weekly", "monthly"],
+}
+# Toronto, New York, Waterloo (~94 km from Toronto), London UK
+POINTS = [None, (43.6532, -79.3832), (40.7128, -74.006), (43.4643, -80.5204), (51.5074, -0.1278)]
+
+
+def random_rows(rng: random.Random, n: int, prefix: str):
+    rows = []
+    for i in range(n):
+        point = rng.choice(POINTS)
+        rows.append(SimpleNamespace(
+            name=f"{prefix}{i}",
+            latitude=point and point[0],
+            longitude=point and point[1],
+            **{field: rng.choice(values) for field, values in CHOICES.items()},
+        ))
+    return rows
+
+
+def test_score_block_matches_scalar_scorer():
+    rng = random.Random(0)
+    investors = random_rows(rng, 400, "i")
+    firms = random_rows(rng, 250, "f")
+
+    scores = score_block(_Side(firms), _Side(investors))
+
+    expected = np.array([[calculate_investor_match_score(i, f) for i in investors] for f in firms])
+    assert scores.shape == expected.shape
+    assert np.array_equal(scores, expected)
+
+
+def _sequential_top(entity, rows, k, entity_is_firm):
+    scored = [
+        (row, calculate_investor_match_score(row, entity) if entity_is_firm
+         else calculate_investor_match_score(entity, row))
+        for row in rows
+    ]
+    scored.sort(key=lambda r: r[1], reverse=True)
+    return [(row.name, score) for row, score in scored[:k]]
+
+
+def test_sharded_top_k_matches_sequential_sort():
+    rng = random.Random(1)
+    investors = random_rows(rng, 3000, "i")
+    firms = random_rows(rng, 3000, "f")
+    by_investor = ShardedTable(investors, generation=0, n_shards=7)
+    by_firm = ShardedTable(firms, generation=0, n_shards=4)
+
+    for q in range(25):
+        firm, investor = firms[q], investors[q]
+        got = [(row.name, score) for row, score in by_investor.top_k(firm, 5, entity_is_firm=True)]
+        assert got == _sequential_top(firm, investors, 5, entity_is_firm=True)
+        got = [(row.name, score) for row, score in by_firm.top_k(investor, 5, entity_is_firm=False)]
+        assert got == _sequential_top(investor, firms, 5, entity_is_firm=False)
+
+
+def test_sharded_top_k_breaks_ties_by_table_order():
+    rng = random.Random(2)
+    firm = random_rows(rng, 1, "f")[0]
+    # identical rows: every score ties, so the result is decided by order alone
+    template = vars(random_rows(rng, 1, "i")[0])
+    investors = [SimpleNamespace(**{**template, "name": f"i{i}"}) for i in range(100)]
+    table = ShardedTable(investors, generation=0, n_shards=6)
+
+    got = [row.name for row, _ in table.top_k(firm, 10, entity_is_firm=True)]
+    assert got == [f"i{i}" for i in range(10)]
+
+    # more results than a shard holds
+    got = [row.name for row, _ in table.top_k(firm, 40, entity_is_firm=True)]
+    assert got == [f"i{i}" for i in range(40)]
+
+
+def test_extended_table_matches_sequential_sort():
+    rng = random.Random(3)
+    investors = random_rows(rng, 2000, "i")
+    firms = random_rows(rng, 10, "f")
+    # built on part of the rows, the rest appended in two batches
+    table = ShardedTable(investors[:1500], generation=0, n_shards=5)
+    table = table.extended(investors[1500:1900], generation=1).extended(investors[1900:], generation=2)
+
+    assert table.generation == 2 and len(table.shards) == 6
+    for firm in firms:
+        got = [(row.name, score) for row, score in table.top_k(firm, 5, entity_is_firm=True)]
+        assert got == _sequential_top(firm, investors, 5, entity_is_firm=True)
@@ -1,13 +1,15 @@
 // Recorder.tsx
 import { useEffect, useRef, useState } from "react";
+import { toCompactWav } from "../../src/lib/audio";
 
 type Props = {
   postUrl?: string;              // e.g., "/api/upload"
   uploadWithPresignedUrl?: (file: File) => Promise<void>; // if using S3 direct upload
   maxMs?: number;                // optional auto-stop
+  compactAudio?: boolean;        // upload 16 kHz mono PCM WAV instead of the raw recording
 };
 
-export default function Recorder({ postUrl, uploadWithPresignedUrl, maxMs }: Props) {
+export default function Recorder({ postUrl, uploadWithPresignedUrl, maxMs, compactAudio }: Props) {
   const videoRef = useRef<HTMLVideoElement | null>(null);
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
   const [stream, setStream] = useState<MediaStream | null>(null);
@@ -77,7 +79,15 @@ export default function Recorder({ postUrl, uploadWithPresignedUrl, maxMs }: Pro
   async function upload() {
     if (!chunks.length) return;
     const type = mediaRecorderRef.current?.mimeType ?? "video/webm";
-    const file = new File(chunks, `pitch_${Date.now()}.webm`, { type });
+    let file = new File(chunks, `pitch_${Date.now()}.webm`, { type });
+    if (compactAudio) {
+      try {
+        const wav = await toCompactWav(file);
+        file = new File([wav], `pitch_${Date.now()}.wav`, { type: "audio/wav" });
+      } catch {
+        // keep the original recording if the browser can't decode it
+      }
+    }
 
     if (uploadWithPresignedUrl) {
       await uploadWithPresignedUrl(file);
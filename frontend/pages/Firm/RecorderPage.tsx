@@ -4,6 +4,7 @@ import { fetchUserAttributes, fetchAuthSession } from "aws-amplify/auth";
 import Navbar from "../../components/Navbar";
 import apiClient from "../../services/api-client";
 import MatchFirmToInvestorsList from "../../components/MatchFirmToInvestorsList";
+import { COMPACT_AUDIO_UPLOADS, toCompactWav } from "../../src/lib/audio";
 
 export default function RecorderPage() {
   // --- firm exists check ---
@@ -110,7 +111,16 @@ export default function RecorderPage() {
     setErr(null);
     try {
       const type = mediaRecorderRef.current?.mimeType || "video/webm";
-      const file = new File(chunksRef.current, `pitch_${Date.now()}.webm`, { type });
+      let file = new File(chunksRef.current, `pitch_${Date.now()}.webm`, { type });
+      if (COMPACT_AUDIO_UPLOADS) {
+        try {
+          // 16 kHz mono PCM: far smaller than the video, and the backend skips ffmpeg for it
+          const wav = await toCompactWav(file);
+          file = new File([wav], `pitch_${Date.now()}.wav`, { type: "audio/wav" });
+        } catch {
+          // browser couldn't decode its own recording; send it as-is
+        }
+      }
 
       let email = "";
       try {
@@ -0,0 +1,61 @@
+// Compact audio for pitch uploads: downmix + resample to 16 kHz mono and wrap
+// as 16-bit PCM WAV, the exact format Whisper consumes. The backend detects
+// this format and skips ffmpeg entirely. ~32 KB/s vs ~250 KB/s for the
+// 2 Mbps webm video the recorder produces.
+
+export const COMPACT_SAMPLE_RATE = 16_000;
+
+// Pages that don't take a compactAudio prop follow this; build with
+// VITE_COMPACT_AUDIO=false to upload the original recording instead.
+export const COMPACT_AUDIO_UPLOADS = import.meta.env.VITE_COMPACT_AUDIO !== "false";
+
+export async function toCompactWav(recording: Blob): Promise<Blob> {
+  const decodeCtx = new AudioContext();
+  let decoded: AudioBuffer;
+  try {
+    decoded = await decodeCtx.decodeAudioData(await recording.arrayBuffer());
+  } finally {
+    decodeCtx.close();
+  }
+
+  // OfflineAudioContext with one channel downmixes; its rate does the resampling
+  const frames = Math.ceil(decoded.duration * COMPACT_SAMPLE_RATE);
+  const offline = new OfflineAudioContext(1, Math.max(1, frames), COMPACT_SAMPLE_RATE);
+  const source = offline.createBufferSource();
+  source.buffer = decoded;
+  source.connect(offline.destination);
+  source.start();
+  const rendered = await offline.startRendering();
+
+  return encodeWavPcm16(rendered.getChannelData(0), COMPACT_SAMPLE_RATE);
+}
+
+export function encodeWavPcm16(samples: Float32Array, sampleRate: number): Blob {
+  const dataBytes = samples.length * 2;
+  const buf = new ArrayBuffer(44 + dataBytes);
+  const view = new DataView(buf);
+  const ascii = (offset: number, s: string) => {
+    for (let i = 0; i < s.length; i++) view.setUint8(offset + i, s.charCodeAt(i));
+  };
+
+  ascii(0, "RIFF");
+  view.setUint32(4, 36 + dataBytes, true);
+  ascii(8, "WAVE");
+  ascii(12, "fmt ");
+  view.setUint32(16, 16, true); // fmt chunk size
+  view.setUint16(20, 1, true); // PCM
+  view.setUint16(22, 1, true); // mono
+  view.setUint32(24, sampleRate, true);
+  view.setUint32(28, sampleRate * 2, true); // byte rate
+  view.setUint16(32, 2, true); // block align
+  view.setUint16(34, 16, true); // bits per sample
+  ascii(36, "data");
+  view.setUint32(40, dataBytes, true);
+
+  let offset = 44;
+  for (let i = 0; i < samples.length; i++, offset += 2) {
+    const s = Math.max(-1, Math.min(1, samples[i]));
+    view.setInt16(offset, s < 0 ? s * 0x8000 : s * 0x7fff, true);
+  }
+  return new Blob([buf], { type: "audio/wav" });
+}